@@ -0,0 +1,56 @@
+"""materialized home timelines
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'timelines',
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('post_id', sa.Integer(), sa.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('author_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+    )
+    op.create_index('ix_timelines_user_created', 'timelines', ['user_id', 'created_at', 'post_id'])
+    op.create_index('ix_timelines_user_author', 'timelines', ['user_id', 'author_id'])
+    op.create_index('ix_timelines_post', 'timelines', ['post_id'])
+
+    # Backfill: every author sees all of their own posts...
+    op.execute("""
+        INSERT INTO timelines (user_id, post_id, author_id, created_at)
+        SELECT user_id, id, user_id, created_at
+        FROM posts
+        WHERE user_id IS NOT NULL
+    """)
+    # ...and followers see the non-private posts of everyone they follow
+    op.execute("""
+        INSERT INTO timelines (user_id, post_id, author_id, created_at)
+        SELECT f.follower_id, p.id, p.user_id, p.created_at
+        FROM follows f
+        JOIN posts p ON p.user_id = f.following_id
+        WHERE p.visibility IN ('public', 'followers')
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_timelines_post', table_name='timelines')
+    op.drop_index('ix_timelines_user_author', table_name='timelines')
+    op.drop_index('ix_timelines_user_created', table_name='timelines')
+    op.drop_table('timelines')
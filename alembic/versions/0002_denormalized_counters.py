@@ -0,0 +1,50 @@
+"""denormalized engagement and social counters
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = {
+    'posts': ('likes_count', 'comments_count'),
+    'users': ('follower_count', 'following_count', 'post_count'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            op.add_column(table, sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the source tables (same queries as `python -m app.cli reconcile-counters`)
+    op.execute("""
+        UPDATE posts SET
+            likes_count = (SELECT count(*) FROM likes WHERE likes.post_id = posts.id),
+            comments_count = (SELECT count(*) FROM comments WHERE comments.post_id = posts.id)
+    """)
+    op.execute("""
+        UPDATE users SET
+            follower_count = (SELECT count(*) FROM follows WHERE follows.following_id = users.id),
+            following_count = (SELECT count(*) FROM follows WHERE follows.follower_id = users.id),
+            post_count = (SELECT count(*) FROM posts WHERE posts.user_id = users.id)
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, columns in COUNTERS.items():
+        for column in columns:
+            op.drop_column(table, column)
@@ -0,0 +1,50 @@
+"""composite indexes for the hot list/lookup queries
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name -> (table, columns, partial index condition); must match the Index()
+# declarations in app/db/models.py
+INDEXES = {
+    'ix_posts_visibility_created': ('posts', ['visibility', 'created_at', 'id'], None),
+    'ix_posts_user_created': ('posts', ['user_id', 'created_at', 'id'], None),
+    'ix_comments_post_created': ('comments', ['post_id', 'created_at', 'id'], None),
+    'ix_likes_post_created': ('likes', ['post_id', 'created_at', 'id'], None),
+    'ix_follows_following': ('follows', ['following_id', 'follower_id'], None),
+    'ix_refresh_tokens_user_active': ('refresh_tokens', ['user_id', 'created_at'], 'revoked_at IS NULL'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY doesn't block writes on Postgres, but can't
+    # run inside a transaction. A failed concurrent build leaves an INVALID
+    # index behind: drop it and re-run the migration.
+    with op.get_context().autocommit_block():
+        for name, (table, columns, where) in INDEXES.items():
+            where = sa.text(where) if where else None
+            op.create_index(
+                name, table, columns, if_not_exists=True,
+                postgresql_concurrently=True, postgresql_where=where, sqlite_where=where
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, _, _) in INDEXES.items():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -0,0 +1,71 @@
+"""store refresh tokens as sha256 digests, index expiry for the purge
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    tokens = sa.table(
+        'refresh_tokens',
+        sa.column('id', sa.Integer),
+        sa.column('token_hash', sa.String),
+        sa.column('expires_at', sa.DateTime),
+        sa.column('revoked_at', sa.DateTime),
+    )
+
+    # 1. Replace stored JWTs by their digest (app/utils/token_store.digest),
+    # so refresh tokens already handed out keep working
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(tokens.c.id, tokens.c.token_hash)
+            .where(tokens.c.id > last_id, sa.func.length(tokens.c.token_hash) != 64)
+            .order_by(tokens.c.id).limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            tokens.update().where(tokens.c.id == sa.bindparam('row_id')).values(token_hash=sa.bindparam('digest')),
+            [{'row_id': row.id, 'digest': hashlib.sha256(row.token_hash.encode()).hexdigest()} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    # 2. Revoked tokens now expire when revoked, so the purge only needs expires_at
+    op.execute(tokens.update().where(
+        tokens.c.revoked_at.isnot(None), tokens.c.revoked_at < tokens.c.expires_at
+    ).values(expires_at=tokens.c.revoked_at))
+
+    # 3. Fixed-length column (SQLite doesn't enforce lengths: leave its table alone)
+    if bind.dialect.name != 'sqlite':
+        op.execute(tokens.delete().where(tokens.c.token_hash.is_(None)))
+        op.alter_column('refresh_tokens', 'token_hash', type_=sa.String(64), nullable=False)
+
+    op.create_index('ix_refresh_tokens_expires', 'refresh_tokens', ['expires_at'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Digests can't be turned back into tokens: sessions issued before the
+    # downgrade stop refreshing and their users log in again
+    op.drop_index('ix_refresh_tokens_expires', table_name='refresh_tokens', if_exists=True)
+    if op.get_bind().dialect.name != 'sqlite':
+        op.alter_column('refresh_tokens', 'token_hash', type_=sa.String(), nullable=True)
@@ -0,0 +1,54 @@
+"""decayed hot score per post, indexes for sort=hot and sort=top
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Must match the Index() declarations in app/db/models.py
+INDEXES = {
+    'ix_posts_visibility_hot': ('posts', ['visibility', 'hot_score', 'id']),
+    'ix_posts_visibility_top': ('posts', ['visibility', 'likes_count', 'id']),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('posts', sa.Column('hot_score', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('posts', sa.Column('hot_epoch', sa.Float(), nullable=False, server_default='0'))
+    state = op.create_table(
+        'hot_score_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('epoch', sa.DateTime(), nullable=False),
+        sa.Column('decay_claimed_until', sa.DateTime(), nullable=True),
+    )
+    op.bulk_insert(state, [{'id': 1, 'epoch': datetime.now(timezone.utc).replace(tzinfo=None)}])
+
+    # Scores start at 0: fill them in with `python -m app.cli rebuild-hot-scores`
+    # once the new code is deployed (it also sets the epoch)
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, (table, _) in INDEXES.items():
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+    op.drop_table('hot_score_state')
+    op.drop_column('posts', 'hot_epoch')
+    op.drop_column('posts', 'hot_score')
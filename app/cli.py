@@ -0,0 +1,122 @@
+"""
+Operational commands.
+
+    python -m app.cli create-schema
+    python -m app.cli reconcile-counters
+    python -m app.cli purge-tokens
+    python -m app.cli rebuild-hot-scores
+    python -m app.cli decay-hot-scores
+    python -m app.cli export alice --format zip --output alice.zip
+"""
+import argparse
+import asyncio
+import sys
+from sqlalchemy import select
+from app.db.models import User
+from app.db.session import SessionLocal, AsyncSessionLocal
+from app.core import startup
+from app.utils import counters, token_store, export, hot_score
+
+def create_schema(args):
+    asyncio.run(startup.create_schema())
+    print("Created missing tables")
+
+def reconcile_counters(args):
+    db = SessionLocal()
+    try:
+        posts_fixed, users_fixed = counters.reconcile(db)
+    finally:
+        db.close()
+    print(f"Repaired counters on {posts_fixed} posts and {users_fixed} users")
+
+def purge_tokens(args):
+    db = SessionLocal()
+    try:
+        deleted = token_store.purge_expired_sync(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Deleted {deleted} expired or revoked refresh tokens")
+
+def rebuild_hot_scores(args):
+    db = SessionLocal()
+    try:
+        scored = hot_score.rebuild(db)
+    finally:
+        db.close()
+    print(f"Recomputed hot scores: {scored} posts above zero")
+
+async def _decay_hot_scores():
+    async with AsyncSessionLocal() as db:
+        return await hot_score.decay(db)
+
+def decay_hot_scores(args):
+    touched = asyncio.run(_decay_hot_scores())
+    if touched is None:
+        raise SystemExit("Another decay pass is running")
+    print(f"Decayed hot scores of {touched} posts")
+
+async def _export(username: str, format: str, out):
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(select(User.id).where(User.username == username))
+        if user_id is None:
+            raise SystemExit(f"No user named '{username}'")
+        async for chunk in export.stream(db, user_id, format):
+            out.write(chunk)
+
+def export_user(args):
+    if args.output is None:
+        asyncio.run(_export(args.username, args.format, sys.stdout.buffer))
+        return
+    with open(args.output, "wb") as out:
+        asyncio.run(_export(args.username, args.format, out))
+    print(f"Exported {args.username} to {args.output}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    schema = commands.add_parser(
+        "create-schema",
+        help="Create missing tables from the models (development; deployments run `alembic upgrade head`)"
+    )
+    schema.set_defaults(func=create_schema)
+
+    reconcile = commands.add_parser(
+        "reconcile-counters",
+        help="Recompute like/comment/follow/post counters from the source tables"
+    )
+    reconcile.set_defaults(func=reconcile_counters)
+
+    purge = commands.add_parser(
+        "purge-tokens",
+        help="Delete expired and revoked refresh tokens in batches"
+    )
+    purge.add_argument("--batch-size", type=int, default=None, help="Rows per delete (TOKEN_PURGE_BATCH_SIZE)")
+    purge.set_defaults(func=purge_tokens)
+
+    rebuild = commands.add_parser(
+        "rebuild-hot-scores",
+        help="Recompute every post's hot score from recent posts, likes and comments"
+    )
+    rebuild.set_defaults(func=rebuild_hot_scores)
+
+    decay = commands.add_parser(
+        "decay-hot-scores",
+        help="Re-decay all hot scores to now (run hourly from cron when HOT_SCORE_DECAY_INTERVAL_SECONDS=0)"
+    )
+    decay.set_defaults(func=decay_hot_scores)
+
+    dump = commands.add_parser(
+        "export",
+        help="Stream all of a user's data as NDJSON (or a zip of NDJSON files)"
+    )
+    dump.add_argument("username")
+    dump.add_argument("--format", choices=list(export.MEDIA_TYPES), default="ndjson")
+    dump.add_argument("--output", help="File to write; stdout when omitted")
+    dump.set_defaults(func=export_user)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
+from typing import Dict, Optional
 
 class Settings(BaseSettings):
     # App Settings
@@ -7,15 +8,93 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    READ_DATABASE_URL: Optional[str] = None # Replica for read-only GET endpoints; defaults to DATABASE_URL
+
+    # Connection Pool (each engine: primary and read)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10 # Extra connections opened under load, closed when returned
+    DB_POOL_TIMEOUT: int = 30 # Seconds to wait for a connection before erroring
+    DB_POOL_RECYCLE: int = 1800 # Replace connections older than this (seconds); -1 disables
+    DB_POOL_PRE_PING: bool = True # Check connections on checkout, dropping dead ones
+
+    # Startup (see core/startup.py)
+    DB_CREATE_SCHEMA: bool = False # Create missing tables at startup (local development; deployments run alembic)
+    STARTUP_WARMUP: bool = True # Fill the pools, configure mappers and start the bcrypt workers before serving
+    READINESS_TIMEOUT_SECONDS: float = 2 # /readyz reports a database as down past this
     
     # JWT
     JWT_SECRET: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_PURGE_INTERVAL_SECONDS: int = 3600 # Delete expired/revoked refresh tokens this often; 0 disables (use the CLI)
+    TOKEN_PURGE_BATCH_SIZE: int = 1000 # Rows per delete statement
+
+    # Password Hashing (see core/hashing.py)
+    BCRYPT_ROUNDS: int = 12 # Changing this rehashes passwords on next login
+    HASH_POOL_WORKERS: Optional[int] = None # Defaults to one process per CPU
+    HASH_POOL_QUEUE_SIZE: int = 64 # Jobs allowed to wait before 503s
+    HASH_POOL_RETRY_AFTER_SECONDS: int = 1
+
+    # Rate Limits (see core/rate_limit.py): route name -> "N/period", per user or per IP
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMITS: Dict[str, str] = {
+        "login": "10/minute", # per IP: every attempt costs a bcrypt verify
+        "register": "5/minute", # per IP
+        "refresh": "30/minute", # per IP
+        "create_post": "30/minute", # per user, uploads included
+        "like": "300/minute", # per user: like, unlike, and each id of a batch
+        "follow": "60/minute", # per user: follow, unfollow, and each username of a batch
+        "export": "5/hour", # per user: each export reads the whole account
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000 # Buckets kept in memory; least recently used are dropped
+    RATE_LIMIT_TRUST_FORWARDED: bool = False # Key anonymous clients by X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_PROXY_HOPS: int = 1 # Trusted proxies in front of the app, each appending one X-Forwarded-For entry
+
+    # Auth Caches (see core/security.get_current_user)
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 10000
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: int = 60
     
+    # Query Stats (see db/query_stats.py)
+    QUERY_STATS_HEADERS: bool = False # Send X-Query-Count / X-Query-Time-Ms on every response
+    QUERY_COUNT_WARN_THRESHOLD: int = 20 # Log requests that run more queries than this
+
+    # Metrics (see core/metrics.py)
+    METRICS_ENABLED: bool = True # Serve /metrics in Prometheus text format
+
     # File Uploads
     UPLOAD_DIR: str = "uploads"
+    MAX_UPLOAD_BYTES: int = 5 * 1024 * 1024 # Per image; larger uploads get a 413
+
+    # Response Cache (see core/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = False # Cache GET /posts/ pages, invalidated by post writes
+    RESPONSE_CACHE_URL: Optional[str] = None # redis://... to share the cache between workers; in-process when unset
+    RESPONSE_CACHE_TTL_SECONDS: int = 10 # Also bounds how stale like/comment counts on cached pages can get
+    RESPONSE_CACHE_SIZE: int = 1000 # Pages kept by the in-process backend
+
+    # Batch Endpoints
+    BATCH_MAX_ITEMS: int = 100 # Items per batch like/follow request and per GET /posts?ids=
+
+    # Hot Scores (see utils/hot_score.py)
+    HOT_SCORE_HALF_LIFE_HOURS: float = 12 # A like or comment counts half as much after this long
+    HOT_SCORE_DECAY_INTERVAL_SECONDS: int = 3600 # Decay once the epoch is this old (any number of processes); 0: cron the CLI instead
+    HOT_SCORE_DECAY_BATCH_SIZE: int = 1000 # Posts rescaled per transaction by a decay pass
+
+    # Account Export (see utils/export.py)
+    EXPORT_BATCH_SIZE: int = 1000 # Rows fetched from the server-side cursor per chunk sent
+
+    # Likes (see utils/like_buffer.py)
+    LIKE_WRITE_BEHIND: bool = False # Buffer likes/unlikes in memory and write them in batches
+    LIKE_FLUSH_INTERVAL_MS: int = 50 # How long a buffered like may wait before it is written
+    LIKE_BUFFER_MAX: int = 5000 # Pending operations that trigger an early flush
+
+    # Social Graph (see utils/social_graph.py)
+    SOCIAL_GRAPH_ENABLED: bool = False # Keep the follows table in memory for graph reads
+    SOCIAL_GRAPH_REFRESH_SECONDS: int = 300 # Full reload, picks up other workers' follows
+
+    # Home Timelines
+    TIMELINE_BACKFILL_LIMIT: int = 200 # Recent posts copied into a feed on follow
 
     # This replaces 'class Config' entirely in Pydantic V2
     model_config = SettingsConfigDict(
@@ -0,0 +1,88 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from passlib.context import CryptContext
+from app.core.config import settings
+
+# Requirements: Password hashing (bcrypt)
+# Hashes made with a different cost are flagged for rehash by verify_and_update()
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing queue is full; surfaced to clients as 503 + Retry-After."""
+
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+        super().__init__("Password hashing queue is full")
+
+# Worker functions run inside the pool's processes, so they must be top-level
+def _hash(password: str):
+    return pwd_context.hash(password)
+
+def _verify_and_update(plain_password: str, hashed_password: str):
+    try:
+        return pwd_context.verify_and_update(plain_password, hashed_password)
+    except (ValueError, TypeError):
+        # Unknown or malformed hash
+        return False, None
+
+class HashingPool:
+    """
+    Runs bcrypt on a dedicated process pool so it neither holds the GIL nor
+    takes threadpool slots from regular requests. At most `workers` jobs
+    run and `queue_size` more may wait; beyond that callers are rejected
+    right away instead of queueing without bound.
+    """
+
+    def __init__(self, workers: int, queue_size: int, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.pending = 0 # Running + queued jobs (only touched on the event loop)
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                # spawn: don't fork a process that has live threads/connections
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.pending >= self.workers + self.queue_size:
+            raise HashingPoolBusy(self.retry_after)
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+pool = HashingPool(
+    workers=settings.HASH_POOL_WORKERS or os.cpu_count() or 1,
+    queue_size=settings.HASH_POOL_QUEUE_SIZE,
+    retry_after=settings.HASH_POOL_RETRY_AFTER_SECONDS
+)
+
+async def hash_password(password: str):
+    return await pool.run(_hash, password)
+
+async def verify_password(plain_password: str, hashed_password: str):
+    """Returns (is_valid, new_hash). new_hash is set when the stored cost is outdated."""
+    return await pool.run(_verify_and_update, plain_password, hashed_password)
+
+async def warm_up():
+    """Hash once in every worker, so spawning them isn't paid by the first logins."""
+    await asyncio.gather(*(pool.run(_hash, "warm-up") for _ in range(pool.workers)))
@@ -0,0 +1,245 @@
+import threading
+import time
+from bisect import bisect_left
+from starlette.routing import Match
+from app.db import query_stats
+
+# Minimal Prometheus client: counters, gauges and histograms rendered in the
+# text exposition format (0.0.4). Only what /metrics needs, no dependency.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {} # label values tuple -> state
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+class Gauge(Metric):
+    """A settable gauge, or a callback gauge: `fn` returns {label values: value} at scrape time."""
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), fn=None):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels):
+        with self._lock:
+            self._values[labels] = value
+
+    def render(self):
+        if self.fn is not None:
+            items = list(self.fn().items())
+        else:
+            with self._lock:
+                items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items
+        ]
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels):
+        # Per-bucket (non cumulative) counts; cumulated when rendered
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self):
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._values.items()]
+        lines = self.header()
+        for labels, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+# HTTP
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Time until the response body was sent.", ("method", "route")
+))
+http_in_progress = registry.register(Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method", "route")
+))
+http_db_time = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in database queries per request.", ("method", "route")
+))
+http_db_queries = registry.register(Histogram(
+    "http_request_db_queries", "Database queries per request.", ("method", "route"), QUERY_COUNT_BUCKETS
+))
+
+# Rate limiting (see core/rate_limit.py)
+rate_limited = registry.register(Counter(
+    "http_rate_limited_total", "Requests rejected with 429 by a rate limit.", ("limit",)
+))
+
+# Startup (see core/startup.py)
+startup_seconds = registry.register(Gauge(
+    "app_startup_seconds", "Time spent importing the app and warming it up before serving.", ("phase",)
+))
+
+# Database pool (see db/session.TimedQueuePool)
+db_pool_wait = registry.register(Histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool (includes connecting on overflow)."
+))
+
+_pools = {} # name -> pool, read at scrape time
+
+def register_pool(pool, name: str = "primary"):
+    """Expose the size/usage of a QueuePool-style pool under pool="<name>"."""
+    _pools[name] = pool
+
+def _pool_reader(method: str):
+    def read():
+        return {(name,): getattr(pool, method)() for name, pool in _pools.items() if hasattr(pool, method)}
+    return read
+
+for _name, _documentation, _method in (
+    ("db_pool_size", "Configured number of pooled connections.", "size"),
+    ("db_pool_checked_out", "Connections currently in use.", "checkedout"),
+    ("db_pool_checked_in", "Idle connections in the pool.", "checkedin"),
+    ("db_pool_overflow", "Connections open beyond pool_size (negative: not yet opened).", "overflow"),
+):
+    registry.register(Gauge(_name, _documentation, ("pool",), fn=_pool_reader(_method)))
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """
+    Per-route request count, latency, in-flight and DB time. Requests are
+    labelled with the route template (/posts/{post_id}), never the raw path,
+    so label cardinality stays bounded. Latency stops when the last body
+    chunk is sent, so background tasks that run afterwards aren't counted.
+    Must sit inside QueryStatsMiddleware to see the request's DB time.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _route_template(self, scope):
+        # Same matching as the router; a PARTIAL match is a 405 on a known path
+        partial = UNMATCHED_ROUTE
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", UNMATCHED_ROUTE)
+            if match == Match.PARTIAL and partial == UNMATCHED_ROUTE:
+                partial = getattr(route, "path", UNMATCHED_ROUTE)
+        return partial
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        route = self._route_template(scope)
+        started = time.perf_counter()
+        status_code = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            http_in_progress.dec(method, route)
+            http_requests.inc(method, route, str(status_code))
+            http_latency.observe(time.perf_counter() - started, method, route)
+            stats = query_stats.current()
+            if stats is not None:
+                http_db_time.observe(stats.seconds, method, route)
+                http_db_queries.observe(stats.count, method, route)
+
+        async def send_with_metrics(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+            elif message["type"] == "http.response.pathsend":
+                finish()
+
+        http_in_progress.inc(method, route)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            finish()
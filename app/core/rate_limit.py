@@ -0,0 +1,118 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from fastapi import Depends, HTTPException, Request, status
+from app.core.config import settings
+from app.core import metrics
+from app.core.security import get_current_user
+from app.db.models import User
+
+# Token buckets per (limit name, client). A limit "N/period" allows bursts
+# of N and refills at N per period. Applied as route dependencies so the
+# key can be the authenticated user when there is one:
+#
+#     @router.post("/login", dependencies=[Depends(limit_by_ip("login"))])
+#     @router.post("/", dependencies=[Depends(limit_by_user("create_post"))])
+#
+# Buckets live in this process: with several workers a client gets up to
+# N per worker.
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+LIMIT_RE = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+@lru_cache(maxsize=None)
+def parse_limit(limit: str):
+    """Parse "10/minute" -> (10, 60.0) or "100/5 minutes" -> (100, 300.0)."""
+    match = LIMIT_RE.match(limit)
+    if not match:
+        raise ValueError(f"Invalid rate limit '{limit}', expected e.g. '10/minute'")
+    count, multiplier, unit = match.groups()
+    return int(count), float(int(multiplier or 1) * PERIODS[unit])
+
+class TokenBucketLimiter:
+    """
+    In-memory buckets, least recently used evicted past `max_keys` (an
+    evicted client just starts again with a full bucket). One short lock
+    per check, no background thread: buckets refill lazily when read.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict() # key -> [tokens, last refill (monotonic)]
+        self._lock = threading.Lock()
+
+    def acquire(self, key, capacity: int, period: float, cost: int = 1) -> float:
+        """
+        Take `cost` tokens (at most a full bucket). Returns 0 if allowed,
+        else seconds until enough are available.
+        """
+        cost = min(cost, capacity)
+        rate = capacity / period
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(capacity), now]
+                while len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / rate
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+limiter = TokenBucketLimiter(settings.RATE_LIMIT_MAX_KEYS)
+
+def client_ip(request: Request) -> str:
+    if settings.RATE_LIMIT_TRUST_FORWARDED:
+        # Proxies append to X-Forwarded-For, so only the entries our own
+        # RATE_LIMIT_PROXY_HOPS proxies added are trustworthy: the client
+        # picks everything to the left of them. With fewer entries than
+        # hops the request skipped a proxy: fall back to the peer address.
+        forwarded = request.headers.get("x-forwarded-for")
+        hops = max(settings.RATE_LIMIT_PROXY_HOPS, 1)
+        if forwarded:
+            entries = [entry.strip() for entry in forwarded.split(",")]
+            if len(entries) >= hops:
+                return entries[-hops]
+    return request.client.host if request.client else "unknown"
+
+def check(name: str, client: str, cost: int = 1):
+    """Spend `cost` tokens of limit `name` for `client`, or raise 429 with Retry-After."""
+    if not settings.RATE_LIMIT_ENABLED or name not in settings.RATE_LIMITS:
+        return
+    capacity, period = parse_limit(settings.RATE_LIMITS[name])
+    wait = limiter.acquire((name, client), capacity, period, cost)
+    if wait:
+        metrics.rate_limited.inc(name)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests, slow down",
+            headers={"Retry-After": str(math.ceil(wait))}
+        )
+
+def limit_by_ip(name: str):
+    """Dependency: limit `name` per client IP (anonymous routes such as login)."""
+    def dependency(request: Request):
+        check(name, f"ip:{client_ip(request)}")
+    return dependency
+
+def charge_user(name: str, user: User, cost: int = 1):
+    """Limit `name` per user, `cost` tokens at once: batch routes pay one per item."""
+    check(name, f"user:{user.id}", cost)
+
+def limit_by_user(name: str):
+    """Dependency: limit `name` per authenticated user (shares get_current_user with the route)."""
+    def dependency(current_user: User = Depends(get_current_user)):
+        charge_user(name, current_user)
+    return dependency
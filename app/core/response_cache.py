@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import itertools
+import json
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.cache import TTLCache
+from app.db.session import ReadSessionLocal
+
+# Response cache for hot public GETs (see routers/posts.list_posts).
+#
+# Invalidation uses generation tags. Each entry records the generation of
+# every tag it depends on ("post:12", "posts:offset", ...) when it is built.
+# A write bumps the generations of the tags it affects, and an entry whose
+# recorded generations no longer match is a miss. Nothing has to track
+# which keys hold which pages, and the scheme works the same in-process
+# and on a shared store.
+#
+# A generation only has to outlive the entries that recorded it, so it
+# expires RESPONSE_CACHE_TTL_SECONDS after its last bump (a missing one
+# reads as 0). Bumps draw from one ever-growing counter rather than
+# incrementing the tag, so a tag bumped again after expiring never comes
+# back to a value an older entry recorded.
+
+# Bumped by every invalidation: an entry built while a write was
+# committing may hold old rows, so it is served but not stored
+WRITE_TAG = "*"
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: List[Tuple[str, str]] = field(default_factory=list)
+    etag: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    generations: Dict[str, int] = field(default_factory=dict)
+
+class MemoryBackend:
+    """Per-process LRU/TTL store. Invalidations only reach this process."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.tag_generations = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counter = itertools.count(1)
+
+    async def get(self, key: str):
+        return self.entries.get(key)
+
+    async def set(self, key: str, entry: CachedResponse):
+        self.entries.set(key, entry)
+
+    async def generations(self, tags):
+        return {tag: self.tag_generations.get(tag, 0) for tag in tags}
+
+    async def bump(self, tags):
+        generation = next(self.counter)
+        for tag in tags:
+            self.tag_generations.set(tag, generation)
+
+    async def clear(self):
+        self.entries.clear()
+        self.tag_generations.clear()
+
+    def stats(self):
+        return self.entries.stats()
+
+class RedisBackend:
+    """
+    Shared store (RESPONSE_CACHE_URL=redis://...): entries and generations
+    are seen by every worker, so invalidations are too. Needs the optional
+    `redis` package.
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "respcache:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_URL needs the 'redis' package (pip install redis)") from exc
+        self.client = redis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return CachedResponse(
+            body=data["body"].encode(),
+            headers=[tuple(header) for header in data["headers"]],
+            etag=data["etag"],
+            tags=data["tags"],
+            generations=data["generations"]
+        )
+
+    async def set(self, key: str, entry: CachedResponse):
+        raw = json.dumps({
+            "body": entry.body.decode(),
+            "headers": entry.headers,
+            "etag": entry.etag,
+            "tags": entry.tags,
+            "generations": entry.generations
+        })
+        await self.client.set(self.prefix + key, raw, ex=max(1, int(self.ttl)))
+
+    async def generations(self, tags):
+        tags = list(tags)
+        if not tags:
+            return {}
+        values = await self.client.mget([f"{self.prefix}gen:{tag}" for tag in tags])
+        return {tag: int(value or 0) for tag, value in zip(tags, values)}
+
+    async def bump(self, tags):
+        generation = await self.client.incr(f"{self.prefix}gen")
+        async with self.client.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.set(f"{self.prefix}gen:{tag}", generation, ex=max(1, int(self.ttl)))
+            await pipe.execute()
+
+    async def clear(self):
+        async for name in self.client.scan_iter(match=self.prefix + "*"):
+            await self.client.delete(name)
+
+    def stats(self):
+        return None
+
+class ResponseCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self._inflight = {} # key -> Task building that entry (single flight)
+
+    @staticmethod
+    def key(namespace: str, params) -> str:
+        """Stable key from a namespace and query parameters, whatever their order."""
+        raw = json.dumps(sorted(params.multi_items()), separators=(",", ":"))
+        return f"{namespace}:{hashlib.sha256(raw.encode()).hexdigest()[:32]}"
+
+    async def get(self, key: str):
+        entry = await self.backend.get(key)
+        if entry is None:
+            return None
+        if await self.backend.generations(entry.tags) != entry.generations:
+            return None # A tag was invalidated after this entry was built
+        return entry
+
+    async def get_or_build(self, key: str, build):
+        """
+        Cached entry for `key`, or the result of `await build(db)`, which
+        returns a CachedResponse. Concurrent misses on one key in this
+        process share a single build. It may outlive the request that
+        started it, so it runs on a read session of its own, never on a
+        request's.
+        """
+        entry = await self.get(key)
+        if entry is not None:
+            return entry
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._build(key, build))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # One waiter going away must not cancel the build for the others
+        return await asyncio.shield(task)
+
+    async def _build(self, key: str, build):
+        writes = (await self.backend.generations([WRITE_TAG]))[WRITE_TAG]
+        async with ReadSessionLocal() as db:
+            entry = await build(db)
+        entry.generations = await self.backend.generations(entry.tags)
+        if (await self.backend.generations([WRITE_TAG]))[WRITE_TAG] == writes:
+            await self.backend.set(key, entry)
+        return entry
+
+    async def invalidate(self, *tags: str):
+        """Drop every entry depending on any of `tags`. Call after the write commits."""
+        if settings.RESPONSE_CACHE_ENABLED:
+            await self.backend.bump([*tags, WRITE_TAG])
+
+    async def clear(self):
+        await self.backend.clear()
+
+    def stats(self):
+        return self.backend.stats()
+
+def _make_backend():
+    if settings.RESPONSE_CACHE_URL:
+        return RedisBackend(settings.RESPONSE_CACHE_URL, settings.RESPONSE_CACHE_TTL_SECONDS)
+    return MemoryBackend(settings.RESPONSE_CACHE_SIZE, settings.RESPONSE_CACHE_TTL_SECONDS)
+
+cache = ResponseCache(_make_backend())
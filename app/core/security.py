@@ -1,18 +1,36 @@
 import hashlib
-from passlib.context import CryptContext
+import time
 from jose import JWTError, jwt
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.cache import TTLCache
+from app.core.hashing import pwd_context
+from app.db.session import get_async_db
 from app.db.models import User
 
-# Requirements: Password hashing (bcrypt)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+# Auth fast path: sha256(token) -> user id, kept until the token expires
+token_cache = TTLCache(
+    maxsize=settings.AUTH_TOKEN_CACHE_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+# user id -> detached User snapshot, dropped when the user row is edited
+principal_cache = TTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+@event.listens_for(User, "after_update")
+def invalidate_principal(mapper, connection, target):
+    # Role or profile changed through the ORM: stop serving the old snapshot
+    principal_cache.pop(target.id)
+
+# Inline bcrypt for scripts and the CLI; request handlers use core/hashing.py
 def hash_password(password: str):
     return pwd_context.hash(password)
 
@@ -29,27 +47,34 @@ def create_token(data: dict, expires_delta: timedelta):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, settings.JWT_SECRET, algorithm="HS256")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        # Decode JWT
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
-        user_id: str = payload.get("sub")
-        if user_id is None:
+    token_key = hashlib.sha256(token.encode()).digest()
+    user_id = token_cache.get(token_key)
+    if user_id is None:
+        try:
+            # Decode JWT
+            payload = jwt.decode(token, settings.JWT_SECRET, algorithms=["HS256"])
+            user_id = int(payload.get("sub"))
+        except (JWTError, TypeError, ValueError):
             raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-        
-    user = db.query(User).filter(User.id == int(user_id)).first()
+        token_cache.set(token_key, user_id, ttl=payload.get("exp", 0) - time.time())
+
+    user = principal_cache.get(user_id)
     if user is None:
-        raise credentials_exception
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        # Detach so the snapshot can be shared by later requests
+        db.expunge(user)
+        principal_cache.set(user_id, user)
     return user
 
-def check_admin(current_user: User = Depends(get_current_user)):
+async def check_admin(current_user: User = Depends(get_current_user)):
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, 
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+from app.core import hashing, metrics
+from app.core.config import settings
+from app.db.base import Base
+from app.db.session import async_engine, read_async_engine, pool_options
+import app.db.models # Tables and search DDL must be registered for create_schema
+
+logger = logging.getLogger(__name__)
+
+# Importing the app does no I/O: schema creation and the warm-up run from
+# the lifespan (main.py), before the first request is accepted. Each phase
+# is timed into app_startup_seconds{phase} and logged, so slow cold starts
+# show up. A failing warm-up step is logged and skipped: the worker still
+# starts, and /readyz tells the load balancer whether it can serve.
+
+async def create_schema():
+    """Create missing tables (DB_CREATE_SCHEMA, or `python -m app.cli create-schema`)."""
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+async def _fill_pool(engine):
+    """Open pool_size connections at once, so they are all idle in the pool afterwards."""
+    count = pool_options(str(engine.url)).get("pool_size", 1)
+
+    async def connect():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+    await asyncio.gather(*(connect() for _ in range(count)))
+
+async def _warm_pools():
+    await _fill_pool(async_engine)
+    await _fill_pool(read_async_engine)
+
+async def _configure_mappers():
+    configure_mappers()
+
+def _timed(phase: str, seconds: float):
+    metrics.startup_seconds.set(seconds, phase)
+    logger.info("Startup phase %s took %.3fs", phase, seconds)
+
+async def warm_up(app=None):
+    """Run every warm-up step; returns {step: None or the error it raised}."""
+    steps = {
+        "mappers": _configure_mappers,
+        "database_pool": _warm_pools,
+        "password_hashing": hashing.warm_up,
+    }
+    if app is not None:
+        async def openapi():
+            # Built on the first /docs hit otherwise: the JSON schema of every model
+            app.openapi()
+        steps["openapi"] = openapi
+
+    errors = {}
+    started = time.perf_counter()
+    for name, step in steps.items():
+        try:
+            await step()
+            errors[name] = None
+        except Exception as exc:
+            logger.warning("Warm-up step %s failed: %r", name, exc)
+            errors[name] = repr(exc)
+    _timed("warmup", time.perf_counter() - started)
+    return errors
+
+def record_import(started: float):
+    """Called at the end of main.py with a perf_counter() taken at its top."""
+    _timed("import", time.perf_counter() - started)
+
+async def ping(db) -> str:
+    """'ok', or why `db` (a session) didn't answer SELECT 1 in time."""
+    try:
+        await asyncio.wait_for(db.execute(text("SELECT 1")), settings.READINESS_TIMEOUT_SECONDS)
+        return "ok"
+    except asyncio.TimeoutError:
+        return "timeout"
+    except Exception as exc:
+        return f"error: {exc.__class__.__name__}"
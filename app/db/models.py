@@ -1,4 +1,5 @@
-from sqlalchemy import (Column, Integer, String, Text, ForeignKey, DateTime, Boolean, UniqueConstraint)
+from sqlalchemy import (Column, Integer, String, Text, ForeignKey, DateTime, Boolean, Float, UniqueConstraint, Index,
+                        DDL, event, text)
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.db.base import Base
@@ -17,6 +18,11 @@ class User(Base):
     bio = Column(Text)
     avatar_url = Column(String)
     role = Column(String, default="user") # user/admin
+
+    # Denormalized counters, maintained by app/utils/counters.py
+    follower_count = Column(Integer, nullable=False, default=0, server_default="0")
+    following_count = Column(Integer, nullable=False, default=0, server_default="0")
+    post_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # Audit Fields
     created_at = Column(DateTime, default=get_utc_now)
@@ -29,6 +35,12 @@ class User(Base):
 
 class Post(Base):
     __tablename__ = "posts"
+    __table_args__ = (
+        Index("ix_posts_visibility_created", "visibility", "created_at", "id"), # Public listing
+        Index("ix_posts_user_created", "user_id", "created_at", "id"), # Profile listing, follow backfill
+        Index("ix_posts_visibility_hot", "visibility", "hot_score", "id"), # sort=hot, /posts/trending
+        Index("ix_posts_visibility_top", "visibility", "likes_count", "id"), # sort=top
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -36,6 +48,14 @@ class Post(Base):
     content = Column(Text, nullable=False)
     image_url = Column(String, nullable=True) # For local /uploads
     visibility = Column(String, default="public") # public|followers|private
+
+    # Denormalized counters, maintained by app/utils/counters.py
+    likes_count = Column(Integer, nullable=False, default=0, server_default="0")
+    comments_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Time-decayed engagement, maintained by app/utils/hot_score.py: the
+    # score as of hot_epoch (Unix time)
+    hot_score = Column(Float, nullable=False, default=0, server_default="0")
+    hot_epoch = Column(Float, nullable=False, default=0, server_default="0")
     
     created_at = Column(DateTime, default=get_utc_now)
     updated_at = Column(DateTime, default=get_utc_now, onupdate=get_utc_now)
@@ -46,6 +66,9 @@ class Post(Base):
 
 class Comment(Base): # Added based on requirements
     __tablename__ = "comments"
+    __table_args__ = (
+        Index("ix_comments_post_created", "post_id", "created_at", "id"), # Comment listing
+    )
 
     id = Column(Integer, primary_key=True)
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -58,7 +81,10 @@ class Comment(Base): # Added based on requirements
 
 class Like(Base):
     __tablename__ = "likes"
-    __table_args__ = (UniqueConstraint("post_id", "user_id", name="unique_like"),) # Prevents double-like
+    __table_args__ = (
+        UniqueConstraint("post_id", "user_id", name="unique_like"), # Prevents double-like
+        Index("ix_likes_post_created", "post_id", "created_at", "id"), # Likers listing
+    )
 
     id = Column(Integer, primary_key=True)
     post_id = Column(Integer, ForeignKey("posts.id"))
@@ -69,7 +95,11 @@ class Like(Base):
 
 class Follow(Base):
     __tablename__ = "follows"
-    __table_args__ = (UniqueConstraint("follower_id", "following_id", name="unique_follow"),)
+    __table_args__ = (
+        UniqueConstraint("follower_id", "following_id", name="unique_follow"),
+        # The primary key only serves "who do I follow"; this serves fan-out ("who follows me")
+        Index("ix_follows_following", "following_id", "follower_id"),
+    )
 
     follower_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
     following_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
@@ -77,11 +107,91 @@ class Follow(Base):
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        # Logout/refresh look up a user's active tokens newest first. A partial index,
+        # because "revoked_at IS NULL" as a key column doesn't let the planner skip the sort.
+        Index(
+            "ix_refresh_tokens_user_active", "user_id", "created_at",
+            postgresql_where=text("revoked_at IS NULL"), sqlite_where=text("revoked_at IS NULL")
+        ),
+        # Purge of expired rows (revoking a token also expires it)
+        Index("ix_refresh_tokens_expires", "expires_at"),
+    )
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    token_hash = Column(String, unique=True, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False) # sha256 hex of the JWT
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     expires_at = Column(DateTime)
     revoked_at = Column(DateTime, nullable=True) # Used for logout
 
-    user = relationship("User", back_populates="refresh_tokens")
\ No newline at end of file
+    user = relationship("User", back_populates="refresh_tokens")
+
+class TimelineEntry(Base):
+    # Materialized home feed: one row per (reader, post), filled on write
+    __tablename__ = "timelines"
+    __table_args__ = (
+        Index("ix_timelines_user_created", "user_id", "created_at", "post_id"), # Feed range scan
+        Index("ix_timelines_user_author", "user_id", "author_id"), # Unfollow prune
+        Index("ix_timelines_post", "post_id"), # Retract on delete/private
+    )
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    post_id = Column(Integer, ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    created_at = Column(DateTime, nullable=False) # Copy of posts.created_at for ordering
+
+class HotScoreState(Base):
+    # Single row (id=1): the epoch new hot scores start at, and the lease of
+    # the decay pass moving every score to it
+    __tablename__ = "hot_score_state"
+
+    id = Column(Integer, primary_key=True)
+    epoch = Column(DateTime, nullable=False)
+    decay_claimed_until = Column(DateTime, nullable=True)
+
+# Full-text search over posts (queried by app/utils/search.py).
+# Neither structure can be declared as a portable Column, so they are
+# created next to the posts table for the matching dialect only.
+
+# Postgres: weighted tsvector kept up to date by the database + GIN index
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', content), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+# SQLite: external-content FTS5 index synced by triggers
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+        title, content, content='posts', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ai AFTER INSERT ON posts BEGIN
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_ad AFTER DELETE ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS posts_fts_au AFTER UPDATE OF title, content ON posts BEGIN
+        INSERT INTO posts_fts(posts_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Post.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Post.__table__, "before_drop", DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect="sqlite"))
@@ -0,0 +1,76 @@
+import logging
+import time
+from contextvars import ContextVar
+from sqlalchemy import event
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+QUERY_TIME_HEADER = "X-Query-Time-Ms"
+
+class QueryStats:
+    """Queries issued (and time spent in the driver) while handling one request."""
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+# Set per request by QueryStatsMiddleware; engine events add to whatever is current
+_current: ContextVar = ContextVar("query_stats", default=None)
+
+def current():
+    return _current.get()
+
+def instrument(engine):
+    """Count queries run on a (sync or async) engine against the current request."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += time.perf_counter() - started
+
+class QueryStatsMiddleware:
+    """
+    Opens a QueryStats scope per HTTP request. Optionally reports it in
+    response headers (QUERY_STATS_HEADERS) and logs requests that run more
+    than QUERY_COUNT_WARN_THRESHOLD queries, the usual sign of an N+1.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = QueryStats()
+        token = _current.set(stats)
+
+        async def send_with_stats(message):
+            if message["type"] == "http.response.start":
+                if settings.QUERY_STATS_HEADERS:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+                        (QUERY_TIME_HEADER.lower().encode(), f"{stats.seconds * 1000:.2f}".encode()),
+                    ]
+                if stats.count > settings.QUERY_COUNT_WARN_THRESHOLD:
+                    logger.warning(
+                        "%s %s ran %d queries (%.1f ms)",
+                        scope["method"], scope["path"], stats.count, stats.seconds * 1000
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current.reset(token)
@@ -1,17 +1,122 @@
-from sqlalchemy import create_engine
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings # This is where it was failing
+from app.db import query_stats
+from app.core import metrics
 
-# SQLAlchemy setup
-engine = create_engine(settings.DATABASE_URL)
+# Async driver used for each database backend accepted in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def to_async_url(url: str) -> str:
+    """postgresql://... -> postgresql+psycopg://..., sqlite:///... -> sqlite+aiosqlite:///..."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited (db_pool_checkout_seconds)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.db_pool_wait.observe(time.perf_counter() - started)
+
+def pool_options(url: str) -> dict:
+    """Pool settings from Settings.DB_POOL_*, for any engine on `url`."""
+    parsed = make_url(url)
+    # In-memory SQLite must keep its single shared connection (StaticPool)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+def async_pool_options(url: str) -> dict:
+    options = pool_options(url)
+    if options:
+        options["poolclass"] = TimedQueuePool
+    return options
+
+def make_read_only(engine):
+    """
+    Make every connection of `engine` refuse writes: read-only transactions
+    on Postgres, PRAGMA query_only on SQLite. A write that slips into a
+    read route fails loudly instead of landing on a replica.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    backend = sync_engine.dialect.name
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_read_only(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if backend == "postgresql":
+            cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        elif backend == "sqlite":
+            cursor.execute("PRAGMA query_only = ON")
+        cursor.close()
+        # Keep the setting even though the driver opened a transaction for it
+        dbapi_connection.commit()
+
+# SQLAlchemy setup (sync: CLI commands, migrations and scripts)
+engine = create_engine(settings.DATABASE_URL, **pool_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async setup (request handlers and background jobs): all writes go here
+async_engine = create_async_engine(to_async_url(settings.DATABASE_URL), **async_pool_options(settings.DATABASE_URL))
+query_stats.instrument(async_engine)
+metrics.register_pool(async_engine.pool)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    # Objects stay usable after commit without another round trip
+    expire_on_commit=False
+)
+
+# Read-only engine for GET endpoints: the replica when READ_DATABASE_URL is
+# set, otherwise a second pool on the primary. Replicas may lag, so a route
+# that must see the caller's own just-committed write should use the primary.
+READ_URL = settings.READ_DATABASE_URL or settings.DATABASE_URL
+read_async_engine = create_async_engine(to_async_url(READ_URL), **async_pool_options(READ_URL))
+make_read_only(read_async_engine)
+query_stats.instrument(read_async_engine)
+metrics.register_pool(read_async_engine.pool, "read")
+ReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 Base = declarative_base()
 
-# Dependency to get DB session in routes
+# Dependency to get DB session in scripts/sync code
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Dependency to get DB session in routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# Dependency for read-only routes (GET): sessions on the read engine
+async def get_read_db():
+    async with ReadSessionLocal() as db:
+        yield db
@@ -1,16 +1,71 @@
-from fastapi import FastAPI
-from app.routers import auth, posts, feed, users, like, comment
-from app.db.base import Base
-from app.db.session import engine
-import app.db.models
+import time
+_import_started = time.perf_counter()
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from app.routers import auth, posts, feed, users, like, comment, media, health, metrics as metrics_router
+from app.core import hashing, startup
+from app.utils import like_buffer, social_graph, token_store, hot_score
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware
+from app.utils.upload import UploadSizeLimitMiddleware
+from app.utils.responses import FastJSONResponse
+from app.db.query_stats import QueryStatsMiddleware
 
-Base.metadata.create_all(bind=engine)
+# No I/O at import: schema creation is opt-in (DB_CREATE_SCHEMA, or
+# `python -m app.cli create-schema`) and runs in the lifespan with the warm-up
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DB_CREATE_SCHEMA:
+        await startup.create_schema()
+    if settings.STARTUP_WARMUP:
+        await startup.warm_up(app)
+    if settings.LIKE_WRITE_BEHIND:
+        like_buffer.buffer.start()
+    if settings.SOCIAL_GRAPH_ENABLED:
+        await social_graph.graph.start()
+    tasks = []
+    if settings.TOKEN_PURGE_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(token_store.purge_periodically()))
+    if settings.HOT_SCORE_DECAY_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(hot_score.decay_periodically()))
+    else:
+        await hot_score.warn_if_unscheduled()
+    yield
+    for task in tasks:
+        task.cancel()
+    # Let them unwind (close their sessions) before the pools go away
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await social_graph.graph.stop()
+    await like_buffer.buffer.stop()
+    hashing.pool.shutdown()
 
-app = FastAPI(title="Mini Social API")
+app = FastAPI(title="Mini Social API", lifespan=lifespan, default_response_class=FastJSONResponse)
+# Last added runs first: QueryStats opens the per-request scope that Metrics reads
+app.add_middleware(UploadSizeLimitMiddleware)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+
+@app.exception_handler(hashing.HashingPoolBusy)
+async def hashing_pool_busy_handler(request: Request, exc: hashing.HashingPoolBusy):
+    # Shed login/register bursts fast instead of letting them queue up
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many authentication requests, please retry"},
+        headers={"Retry-After": str(exc.retry_after)}
+    )
 
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(posts.router)
 app.include_router(like.router)
 app.include_router(comment.router)
-app.include_router(feed.router)
\ No newline at end of file
+app.include_router(feed.router)
+app.include_router(media.router)
+app.include_router(health.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router.router)
+
+startup.record_import(_import_started)
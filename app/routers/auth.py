@@ -1,21 +1,27 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
 from app.db.models import User, RefreshToken
-from app.schemas.user import UserCreate, Token, UserOut
-from app.core.security import hash_password, verify, create_token, get_current_user
-from datetime import timedelta, datetime, timezone
+from app.schemas.user import UserCreate, Token, UserOut, MessageOut, CacheStats, RefreshRequest
+from app.core.security import create_token, get_current_user, check_admin, token_cache, principal_cache
+from app.core import hashing
+from app.core.rate_limit import limit_by_ip
+from app.utils import token_store
+from app.core.response_cache import cache as response_cache
+from datetime import timedelta
+from typing import Dict
 from fastapi.security import OAuth2PasswordRequestForm
 from app.schemas.user import UserLogin
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-@router.post("/register", response_model=UserOut, status_code=201)
-def register(data: UserCreate, db: Session = Depends(get_db)):
+@router.post("/register", response_model=UserOut, status_code=201, dependencies=[Depends(limit_by_ip("register"))])
+async def register(data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # 1. Check if username or email already exists
-    existing_user = db.query(User).filter(
+    existing_user = (await db.execute(select(User).where(
         (User.username == data.username) | (User.email == data.email)
-    ).first()
+    ))).scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -27,43 +33,43 @@ def register(data: UserCreate, db: Session = Depends(get_db)):
     new_user = User(
         username=data.username,
         email=data.email,
-        password_hash=hash_password(data.password),
+        # bcrypt runs on the hashing process pool
+        password_hash=await hashing.hash_password(data.password),
         # If data.role is not provided, SQLAlchemy uses the "user" default
         role=data.role if hasattr(data, 'role') and data.role else "user"
     )
     
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
     
-@router.post("/login", response_model=Token)
-def login(
+@router.post("/login", response_model=Token, dependencies=[Depends(limit_by_ip("login"))])
+async def login(
     data: OAuth2PasswordRequestForm = Depends(), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # 1. Find the user
-    user = db.query(User).filter(
+    user = (await db.execute(select(User).where(
         (User.username == data.username) | 
         (User.email == data.username)
-    ).first()
+    ))).scalars().first()
     
     # 2. Verify password
-    if not user or not verify(data.password, user.password_hash):
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    is_valid, new_hash = await hashing.verify_password(data.password, user.password_hash)
+    if not is_valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Stored with an outdated bcrypt cost: upgrade it now that we know the password
+    if new_hash:
+        user.password_hash = new_hash
     
-    # 3. Create tokens
+    # 3. Create tokens; only the refresh token's digest is stored
     access = create_token({"sub": str(user.id)}, timedelta(minutes=30))
-    refresh = create_token({"sub": str(user.id)}, timedelta(days=7))
-    
-    # 4. Save Refresh Token to Database
-    db_refresh = RefreshToken(
-        user_id=user.id, 
-        token_hash=refresh, 
-        expires_at=datetime.now(timezone.utc) + timedelta(days=7)
-    )
-    db.add(db_refresh)
-    db.commit()
+    refresh = token_store.issue(db, user.id)
+    await db.commit()
     
     # 5. Return response
     return {
@@ -73,55 +79,63 @@ def login(
     }
 
 @router.get("/me", response_model=UserOut)
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: User = Depends(get_current_user)):
     """
     Who am I: No input needed. 
     FastAPI extracts the token from the header and finds the user in the DB.
     """
     return current_user
 
-@router.post("/logout")
-def logout(
-    db: Session = Depends(get_db), 
+@router.post("/logout", response_model=MessageOut)
+async def logout(
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
     """
     Logout: Instead of asking for a token, we find the latest 
     active refresh token in the DB belonging to the current user.
     """
-    db_token = db.query(RefreshToken).filter(
+    db_token = (await db.execute(select(RefreshToken).where(
         RefreshToken.user_id == current_user.id,
         RefreshToken.revoked_at == None
-    ).order_by(RefreshToken.created_at.desc()).first()
+    ).order_by(RefreshToken.created_at.desc()))).scalars().first()
 
     if db_token:
-        db_token.revoked_at = datetime.now(timezone.utc)
-        db.commit()
+        token_store.revoke(db_token)
+        await db.commit()
         return {"message": "Logged out and token revoked"}
     
     return {"message": "No active session found"}
 
-@router.post("/refresh", response_model=Token)
-def refresh_access_token(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+@router.post("/refresh", response_model=Token, dependencies=[Depends(limit_by_ip("refresh"))])
+async def refresh_access_token(
+    data: RefreshRequest,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Refresh: Uses the identity of the current user to find 
-    their valid refresh token and issue a new access token.
+    Refresh: Trade the refresh token from /login for a new access token.
+    Works after the access token has expired, so no Authorization header.
     """
-    db_token = db.query(RefreshToken).filter(
-        RefreshToken.user_id == current_user.id,
-        RefreshToken.revoked_at == None
-    ).first()
-
-    if not db_token or db_token.expires_at.replace(tzinfo=timezone.utc) < datetime.now(timezone.utc):
+    # One unique-index lookup on the token's digest
+    db_token = await token_store.find_active(db, data.refresh_token)
+    if not db_token:
         raise HTTPException(status_code=401, detail="Session expired")
 
-    new_access = create_token({"sub": str(current_user.id)}, timedelta(minutes=30))
+    new_access = create_token({"sub": str(db_token.user_id)}, timedelta(minutes=30))
     
     return {
         "access_token": new_access,
-        "refresh_token": db_token.token_hash, 
+        "refresh_token": data.refresh_token, 
         "token_type": "bearer"
-    }
\ No newline at end of file
+    }
+
+@router.get("/cache-stats", response_model=Dict[str, CacheStats], dependencies=[Depends(check_admin)])
+async def auth_cache_stats():
+    """Hit/miss counters of the auth caches (and the in-process response cache)."""
+    stats = {
+        "tokens": token_cache.stats(),
+        "principals": principal_cache.stats()
+    }
+    if response_cache.stats() is not None:
+        stats["responses"] = response_cache.stats()
+    return stats
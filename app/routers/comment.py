@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.db.models import Comment, Post, User
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db, get_read_db
+from app.db.models import Comment, Post, User, get_utc_now
 from app.core.security import get_current_user
+from app.utils.pagination import paginate, NEXT_CURSOR_HEADER
+from app.utils import counters, conditional, hot_score
+from app.utils.responses import json_response
+from app.schemas.post import CommentOut, CommentOutList
+from app.schemas.user import MessageOut
+from typing import List
 from pydantic import BaseModel
 
 router = APIRouter(tags=["Comments"])
@@ -11,73 +19,88 @@ class CommentCreate(BaseModel):
     content: str
 
 #  POST /posts/{post_id}/comments
-@router.post("/posts/{post_id}/comments")
-def create_comment(
-    post_id: int, 
-    data: CommentCreate, 
-    db: Session = Depends(get_db), 
+@router.post("/posts/{post_id}/comments", response_model=CommentOut)
+async def create_comment(
+    post_id: int,
+    data: CommentCreate,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # Verify post exists
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
-    
+
     new_comment = Comment(
         content=data.content,
         post_id=post_id,
-        user_id=current_user.id
+        user_id=current_user.id,
+        created_at=get_utc_now()
     )
     db.add(new_comment)
-    db.commit()
-    db.refresh(new_comment)
+    await hot_score.bump(db, [(post_id, hot_score.COMMENT_WEIGHT, new_comment.created_at)])
+    await counters.bump(db, Post, post_id, comments_count=1)
+    await db.commit()
+    await db.refresh(new_comment, ["user"])
     return new_comment
 
 
-@router.get("/posts/{post_id}/comments")
-def get_comments(
-    post_id: int, 
-    page: int = Query(1, ge=1), 
-    limit: int = Query(10, le=50), 
-    db: Session = Depends(get_db)
+@router.get("/posts/{post_id}/comments", response_model=List[CommentOut])
+async def get_comments(
+    post_id: int,
+    request: Request,
+    response: Response,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: str = None,
+    db: AsyncSession = Depends(get_read_db)
 ):
-    # 1. First, check if the post actually exists
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    # 1. First, check if the post actually exists, reading the comment
+    # list's version on the way
+    version = (await db.execute(
+        select(*conditional.comments_version(post_id)).where(Post.id == post_id)
+    )).first()
+    if version is None:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, 
+            status_code=status.HTTP_404_NOT_FOUND,
             detail="Post not found"
         )
 
-    # 2. Fetch comments
-    skip = (page - 1) * limit
-    comments = db.query(Comment).filter(Comment.post_id == post_id)\
-                 .order_by(Comment.created_at.desc())\
-                 .offset(skip).limit(limit).all()
+    # The client's copy of this page is current: skip the comments query
+    etag = conditional.weak_etag(post_id, request.url.query, *version)
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified(etag)
+    conditional.set_validators(response, etag)
 
-    # 3. Handle empty comment list vs populated list
-    if not comments:
-        # return an empty list with a 200 OK because the post exists, 
-        # it just doesn't have comments yet.
-        return []
+    # 2. Fetch comments (newest first, by cursor or page)
+    comments, next_cursor = await paginate(
+        db, select(Comment).options(joinedload(Comment.user)).where(Comment.post_id == post_id),
+        Comment.created_at, Comment.id, limit, cursor, page
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
 
-    return comments
+    # 3. An empty list is still a 200 OK: the post exists,
+    # it just doesn't have comments yet.
+    return json_response(CommentOutList, comments, response)
 
 # DELETE /comments/{comment_id}
-@router.delete("/comments/{comment_id}")
-def delete_comment(
-    comment_id: int, 
-    db: Session = Depends(get_db), 
+@router.delete("/comments/{comment_id}", response_model=MessageOut)
+async def delete_comment(
+    comment_id: int,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = await db.get(Comment, comment_id)
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
-    
+
     # Permission Check: Owner of comment OR Admin
     if comment.user_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
-    
-    db.delete(comment)
-    db.commit()
-    return {"message": "Comment deleted"}
\ No newline at end of file
+
+    await db.delete(comment)
+    await hot_score.bump(db, [(comment.post_id, -hot_score.COMMENT_WEIGHT, comment.created_at)])
+    await counters.bump(db, Post, comment.post_id, comments_count=-1)
+    await db.commit()
+    return {"message": "Comment deleted"}
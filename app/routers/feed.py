@@ -1,38 +1,40 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.db.models import Post, Follow, User
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_read_db
+from app.db.models import Post, User, TimelineEntry
 from app.core.security import get_current_user
-from sqlalchemy import or_
+from app.utils.pagination import paginate, NEXT_CURSOR_HEADER
+from app.utils.responses import json_response
+from app.schemas.post import PostOut, PostOutList
 from typing import List
 
 router = APIRouter(prefix="/feed", tags=["Feed"])
 
-@router.get("/")
-def get_personalized_feed(
-    db: Session = Depends(get_db),
+@router.get("/", response_model=List[PostOut])
+async def get_personalized_feed(
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None
 ):
-    # 1. Get list of user IDs that current_user follows
-    following_ids_tuples = db.query(Follow.following_id).filter(
-        Follow.follower_id == current_user.id
-    ).all()
-    following_ids = [fid[0] for fid in following_ids_tuples]
+    # The timeline is materialized on write (see app/utils/timeline.py):
+    # - MY posts are added when I create them (regardless of visibility)
+    # - Followed users' 'public'/'followers' posts are fanned out to me
+    # so reading the feed is a single indexed range scan over my rows.
+    posts = select(Post).options(joinedload(Post.author)).join(
+        TimelineEntry, TimelineEntry.post_id == Post.id
+    ).where(
+        TimelineEntry.user_id == current_user.id
+    )
 
-    # 2. Build the query with visibility rules:
-    # - Show MY posts (regardless of visibility)
-    # - Show followed users' posts IF they are 'public' or 'followers'
-    posts = db.query(Post).filter(
-        or_(
-            # Rule A: It's my own post
-            Post.user_id == current_user.id,
-            # Rule B: It's a post from someone I follow AND it's not private
-            (Post.user_id.in_(following_ids)) & (Post.visibility.in_(["public", "followers"]))
-        )
-    ).order_by(Post.created_at.desc())
-
-    # 3. Apply Pagination
-    skip = (page - 1) * limit
-    return posts.offset(skip).limit(limit).all()
\ No newline at end of file
+    # Apply Pagination: keyset on the timeline's own (created_at, post_id)
+    posts, next_cursor = await paginate(
+        db, posts, TimelineEntry.created_at, TimelineEntry.post_id, limit, cursor, page
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(PostOutList, posts, response)
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import startup
+from app.core.config import settings
+from app.db.session import get_async_db, get_read_db
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter(tags=["Monitoring"])
+
+@router.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process answers. No I/O, so a slow database never gets the worker restarted."""
+    return {"status": "ok"}
+
+@router.get("/readyz", include_in_schema=False)
+async def readyz(db: AsyncSession = Depends(get_async_db), read_db: AsyncSession = Depends(get_read_db)):
+    """Readiness: the databases answer within READINESS_TIMEOUT_SECONDS, else 503."""
+    checks = {"database": await startup.ping(db)}
+    if settings.READ_DATABASE_URL:
+        checks["read_database"] = await startup.ping(read_db)
+    ready = all(result == "ok" for result in checks.values())
+    return FastJSONResponse(
+        {"status": "ready" if ready else "unavailable", "checks": checks},
+        status_code=200 if ready else 503
+    )
@@ -1,62 +1,166 @@
-from app.db.models import Post, User, Like
-from fastapi import APIRouter, Depends, HTTPException
+from app.db.models import Post, User, Like, get_utc_now
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from app.core.security import get_current_user
-from app.db.session import get_db
-from sqlalchemy.orm import Session
-from app.db.models import Post, User
+from app.core.rate_limit import limit_by_user, charge_user
+from app.db.session import get_async_db, get_read_db
+from app.utils.pagination import paginate, NEXT_CURSOR_HEADER
+from app.utils import counters, like_buffer, hot_score
+from app.core.config import settings
+from app.utils.bulk import insert_ignore
+from app.utils.responses import json_response
+from app.schemas.user import MessageOut, UserPublic, UserPublicList
+from app.schemas.post import LikeBatchIn, LikeBatchResult
+from typing import List
+from sqlalchemy import select, delete, literal, DateTime
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(prefix="/like", tags=["Posts"])
 
 #  POST /posts/{post_id}/like
-@router.post("/{post_id}/like")
-def like_post(
-    post_id: int, 
-    db: Session = Depends(get_db), 
+@router.post("/{post_id}/like", response_model=MessageOut, dependencies=[Depends(limit_by_user("like"))])
+async def like_post(
+    post_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    # 1. Check if post exists
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
-        raise HTTPException(status_code=404, detail="Post not found")
-    
-    # 2. Idempotency Check: Already liked?
-    existing_like = db.query(Like).filter_by(
-        user_id=current_user.id, 
-        post_id=post_id
-    ).first()
-    
-    if existing_like:
+    # Write-behind: acknowledge now, the like is written with the next flush
+    if settings.LIKE_WRITE_BEHIND:
+        like_buffer.buffer.add(current_user.id, post_id, True)
+        response.status_code = 202
+        return {"message": "Like accepted"}
+
+    # 1. Insert the like if the post exists, in one statement. A repeat (or
+    # a concurrent duplicate) hits unique_like and is skipped, not a 500.
+    now = get_utc_now()
+    liked = (await db.execute(
+        insert_ignore(db, Like).from_select(
+            ["user_id", "post_id", "created_at"],
+            select(literal(current_user.id), Post.id, literal(now, DateTime)).where(Post.id == post_id)
+        ).returning(Like.post_id)
+    )).scalar()
+
+    # 2. Nothing inserted: tell a missing post from an existing like
+    if liked is None:
+        if await db.get(Post, post_id) is None:
+            raise HTTPException(status_code=404, detail="Post not found")
         return {"message": "Post already liked"}
 
-    # 3. Create Like
-    new_like = Like(user_id=current_user.id, post_id=post_id)
-    db.add(new_like)
-    db.commit()
-    
+    await hot_score.bump(db, [(post_id, hot_score.LIKE_WEIGHT, now)])
+    await counters.bump(db, Post, post_id, likes_count=1)
+    await db.commit()
+
     return {"message": "Post liked successfully"}
 
 # DELETE /posts/{post_id}/like
-@router.delete("/{post_id}/like")
-def unlike_post(
-    post_id: int, 
-    db: Session = Depends(get_db), 
+@router.delete("/{post_id}/like", response_model=MessageOut, dependencies=[Depends(limit_by_user("like"))])
+async def unlike_post(
+    post_id: int,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    like_record = db.query(Like).filter_by(
-        user_id=current_user.id, 
-        post_id=post_id
-    ).first()
-    
-    if not like_record:
+    if settings.LIKE_WRITE_BEHIND:
+        like_buffer.buffer.add(current_user.id, post_id, False)
+        response.status_code = 202
+        return {"message": "Unlike accepted"}
+
+    # Delete and learn whether there was anything to delete in one statement
+    liked_at = (await db.execute(
+        delete(Like)
+        .where(Like.user_id == current_user.id, Like.post_id == post_id)
+        .returning(Like.created_at)
+    )).first()
+
+    if liked_at is None:
         raise HTTPException(status_code=400, detail="You haven't liked this post")
-    
-    db.delete(like_record)
-    db.commit()
+
+    # Take back what the like added, decayed from when it was made
+    await hot_score.bump(db, [(post_id, -hot_score.LIKE_WEIGHT, liked_at.created_at)])
+    await counters.bump(db, Post, post_id, likes_count=-1)
+    await db.commit()
     return {"message": "Post unliked successfully"}
 
+# POST /like/batch
+@router.post("/batch", response_model=List[LikeBatchResult])
+async def like_batch(
+    data: LikeBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Like and unlike many posts in one request and one transaction: a fixed
+    number of statements however many ids are sent. Returns one status per
+    id, in request order.
+    """
+    like_ids = list(dict.fromkeys(data.like))
+    unlike_ids = list(dict.fromkeys(data.unlike))
+    if set(like_ids) & set(unlike_ids):
+        raise HTTPException(status_code=400, detail="A post cannot be both liked and unliked")
+    # Each id counts against the "like" limit, as a single like would
+    charge_user("like", current_user, len(like_ids) + len(unlike_ids))
+
+    # 1. Which of the requested posts exist
+    existing = set((await db.execute(
+        select(Post.id).where(Post.id.in_(like_ids + unlike_ids))
+    )).scalars().all()) if like_ids or unlike_ids else set()
+
+    # 2. Insert the likes; rows that already exist are skipped by the unique constraint
+    to_like = [post_id for post_id in like_ids if post_id in existing]
+    liked = set()
+    now = get_utc_now()
+    if to_like:
+        liked = set((await db.execute(
+            insert_ignore(db, Like)
+            .values([{"user_id": current_user.id, "post_id": post_id, "created_at": now} for post_id in to_like])
+            .returning(Like.post_id)
+        )).scalars().all())
+
+    # 3. Delete the unlikes; RETURNING tells which ones were actually there
+    to_unlike = [post_id for post_id in unlike_ids if post_id in existing]
+    unliked = {}
+    if to_unlike:
+        unliked = dict((await db.execute(
+            delete(Like)
+            .where(Like.user_id == current_user.id, Like.post_id.in_(to_unlike))
+            .returning(Like.post_id, Like.created_at)
+        )).all())
+
+    # 4. One hot score update, then one counter update per direction
+    await hot_score.bump(db, [
+        *((post_id, hot_score.LIKE_WEIGHT, now) for post_id in liked),
+        *((post_id, -hot_score.LIKE_WEIGHT, liked_at) for post_id, liked_at in unliked.items())
+    ])
+    await counters.bump_many(db, Post, liked, likes_count=1)
+    await counters.bump_many(db, Post, unliked, likes_count=-1)
+    await db.commit()
+
+    results = []
+    for post_id in like_ids:
+        status = "not_found" if post_id not in existing else "liked" if post_id in liked else "already_liked"
+        results.append({"post_id": post_id, "status": status})
+    for post_id in unlike_ids:
+        status = "not_found" if post_id not in existing else "unliked" if post_id in unliked else "not_liked"
+        results.append({"post_id": post_id, "status": status})
+    return results
+
 #  GET /posts/{post_id}/likes (List users who liked)
-@router.get("/{post_id}/likes")
-def get_post_likes(post_id: int, db: Session = Depends(get_db)):
-    # Join with User table to get the usernames of people who liked
-    likes = db.query(User).join(Like).filter(Like.post_id == post_id).all()
-    return likes
\ No newline at end of file
+@router.get("/{post_id}/likes", response_model=List[UserPublic])
+async def get_post_likes(
+    post_id: int,
+    response: Response,
+    page: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: str = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Join with User table to get the usernames of people who liked,
+    # most recent likes first, paginated on the like's (created_at, id)
+    stmt = select(User, Like.created_at, Like.id).join(Like).where(Like.post_id == post_id)
+    rows, next_cursor = await paginate(
+        db, stmt, Like.created_at, Like.id, limit, cursor, page,
+        key=lambda row: (row[1], row[2])
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(UserPublicList, [user for user, _, _ in rows], response)
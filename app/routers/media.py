@@ -0,0 +1,62 @@
+import hashlib
+import os
+import re
+from email.utils import formatdate
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from app.core.config import settings
+from app.utils import upload
+from app.utils.conditional import is_not_modified
+
+# Serves Post.image_url values ("uploads/<name>") straight from settings.UPLOAD_DIR.
+# FileResponse handles Range/If-Range and hands the path to the server through
+# the ASGI pathsend extension when it supports it (zero-copy sendfile).
+router = APIRouter(prefix=f"/{upload.URL_PREFIX}", tags=["Media"])
+
+# Names written by upload.save_upload(): content never changes for a given name
+HASHED_NAME_RE = re.compile(r"^([0-9a-f]{64})\.\w+$")
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Older "<uuid>_<filename>" uploads
+LEGACY_CACHE = "public, max-age=86400"
+
+def _stat_file(path: str):
+    try:
+        result = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return result if os.path.isfile(path) else None
+
+def _etag(filename: str, stat_result: os.stat_result):
+    hashed = HASHED_NAME_RE.match(filename)
+    if hashed:
+        return f'"{hashed.group(1)}"'
+    base = f"{stat_result.st_mtime_ns}-{stat_result.st_size}"
+    return f'"{hashlib.sha256(base.encode()).hexdigest()[:32]}"'
+
+@router.get("/{filename}")
+@router.head("/{filename}", include_in_schema=False) # One operation id in the schema
+async def get_media(filename: str, request: Request):
+    # 1. Only plain file names inside UPLOAD_DIR (no traversal, no temp files)
+    if filename != os.path.basename(filename) or filename.startswith("."):
+        raise HTTPException(status_code=404, detail="File not found")
+    path = os.path.join(settings.UPLOAD_DIR, filename)
+
+    stat_result = await run_in_threadpool(_stat_file, path)
+    if stat_result is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    # 2. Validators + caching headers, shared by 200/206/304
+    etag = _etag(filename, stat_result)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE if HASHED_NAME_RE.match(filename) else LEGACY_CACHE,
+    }
+
+    # 3. Revalidation: nothing to send
+    if is_not_modified(request, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    # 4. Full body or Range (single/multipart) from disk
+    return FileResponse(path, headers=headers, stat_result=stat_result)
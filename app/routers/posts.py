@@ -1,22 +1,32 @@
-from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import or_, desc
-from app.db.session import get_db
-from app.db.models import Post, User
+from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException, status, Query, BackgroundTasks, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db, get_read_db
+from app.db.models import Post, User, Comment, get_utc_now
 from app.core.security import get_current_user
-import uuid, os, shutil
+from app.core.rate_limit import limit_by_user
+from app.schemas.post import PostOut, PostDetailOut, PostOutList
+from app.schemas.user import MessageOut
+from app.utils import timeline, counters, search, upload, conditional, hot_score
+from app.utils.pagination import paginate, NEXT_CURSOR_HEADER
+from app.core.config import settings
+from app.core.response_cache import cache, CachedResponse
+from app.utils.responses import bytes_response
+from typing import List
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
 # CREATE POST
-@router.post("/")
-def create_post(
+@router.post("/", response_model=PostOut, dependencies=[Depends(limit_by_user("create_post"))])
+async def create_post(
+    background_tasks: BackgroundTasks,
     title: str = Form(None),
     content: str = Form(...),
     # This allows selection in Swagger/Postman, but defaults to "public"
     visibility: str = Form("public"), 
     image: UploadFile = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
     # 1. Validate visibility input
@@ -26,95 +36,262 @@ def create_post(
 
     img_url = None
     if image:
-        os.makedirs("uploads", exist_ok=True)
-        name = f"{uuid.uuid4()}_{image.filename}"
-        path = os.path.join("uploads", name)
-        with open(path, "wb") as buffer:
-            shutil.copyfileobj(image.file, buffer)
-        img_url = path.replace("\\", "/") 
+        # Streamed to disk in chunks; rejected with 413/415 before the post is saved
+        img_url = await upload.save_upload(image)
 
     # 2. Save to DB
+    now = get_utc_now()
+    # Fresh posts get a head start in sort=hot, fading like any like
+    score, epoch = await hot_score.initial(db, now)
     new_post = Post(
         title=title, 
         content=content, 
         image_url=img_url, 
         visibility=visibility, # The selected value is stored here
-        user_id=current_user.id
+        user_id=current_user.id,
+        created_at=now,
+        hot_score=score,
+        hot_epoch=epoch
     )
     
     db.add(new_post)
-    db.commit()
-    db.refresh(new_post)
+    await db.flush()
+    await counters.bump(db, User, current_user.id, post_count=1)
+    # The author sees their post immediately; followers get it via fan-out
+    timeline.add_own_post(db, new_post)
+    await db.commit()
+    # Columns are all known after the flush; only the author needs loading
+    await db.refresh(new_post, ["author"])
+
+    if new_post.visibility in timeline.FOLLOWER_VISIBILITIES:
+        background_tasks.add_task(timeline.fan_out_post, new_post.id)
+    # Newest first: only offset pages (and search results) shift
+    if new_post.visibility == "public":
+        await cache.invalidate(*_listing_tags(new_post.user_id, "offset"), "posts:search")
     return new_post
 
 # LIST POSTS (With Search, Filter, Sort, Pagination)
-@router.get("/")
-def list_posts(
+@router.get("/", response_model=List[PostOut])
+async def list_posts(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1),
-    limit: int = Query(20, le=100),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str = None,
     username: str = None,
     q: str = None,
-    sort: str = "created_at",
-    db: Session = Depends(get_db)
+    # "relevance" (default when q is given), "created_at" (default otherwise),
+    # "hot" (time-decayed likes and comments) or "top" (most liked)
+    sort: str = None,
+    # Comma separated post ids (1,2,3): fetch exactly these, in this order
+    ids: str = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    async def build(db: AsyncSession):
+        posts, next_cursor, tags = await _load_listing(db, page, limit, cursor, username, q, sort, ids)
+        return _render_page(request.url.query, posts, next_cursor, tags)
+    return await _send_listing(request, response, db, "posts", build)
+
+# TRENDING (declared before /{post_id}, which would take "trending" for an id)
+@router.get("/trending", response_model=List[PostOut])
+async def trending_posts(
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    query = db.query(Post).filter(Post.visibility == "public")
+    """Hottest public posts right now: the first page of sort=hot, read off ix_posts_visibility_hot."""
+    async def build(db: AsyncSession):
+        posts, _, tags = await _load_listing(db, 1, limit, None, None, None, "hot", None)
+        return _render_page(request.url.query, posts, None, tags)
+    return await _send_listing(request, response, db, "trending", build)
+
+async def _send_listing(request: Request, response: Response, db: AsyncSession, namespace: str, build):
+    # Public data only, so one cached page serves every caller (built on a
+    # session of the cache's own; `db` is only used when caching is off)
+    if settings.RESPONSE_CACHE_ENABLED:
+        entry = await cache.get_or_build(cache.key(namespace, request.query_params), build)
+    else:
+        entry = await build(db)
+
+    for name, value in entry.headers:
+        response.headers[name] = value
+    # Client's copy is current: nothing to send
+    if conditional.is_not_modified(request, entry.etag):
+        return conditional.not_modified(entry.etag, response)
+    conditional.set_validators(response, entry.etag)
+    return bytes_response(entry.body, response)
+
+def _listing_tags(user_id: int, suffix: str = None):
+    """Response cache tags of the all-posts and per-author listings a post appears in."""
+    tags = ["posts", f"posts:user:{user_id}"]
+    return [f"{tag}:{suffix}" for tag in tags] if suffix else tags
+
+async def _load_listing(db: AsyncSession, page, limit, cursor, username, q, sort, ids):
+    """Returns (posts, next_cursor, cache tags) for list_posts."""
+    # Authors ride along in the same query (PostOut.author)
+    query = select(Post).options(joinedload(Post.author)).where(Post.visibility == "public")
+
+    # Hydrate a known list of ids in one query (unknown or non-public ids are left out)
+    if ids is not None:
+        try:
+            wanted = list(dict.fromkeys(int(part) for part in ids.split(",") if part.strip()))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="ids must be comma separated integers")
+        if len(wanted) > settings.BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=422, detail=f"At most {settings.BATCH_MAX_ITEMS} ids per request")
+        found = {post.id: post for post in (await db.execute(query.where(Post.id.in_(wanted)))).scalars()}
+        posts = [found[post_id] for post_id in wanted if post_id in found]
+        # Missing ids too: they show up once made public
+        return posts, None, [f"post:{post_id}" for post_id in wanted]
+
+    # Which listing this is, for cache invalidation
+    scope = "posts"
 
     # Filter by User
     if username:
-        user = db.query(User).filter(User.username == username).first()
+        user = (await db.execute(select(User).where(User.username == username))).scalars().first()
         if user:
-            query = query.filter(Post.user_id == user.id)
+            query = query.where(Post.user_id == user.id)
+            scope = f"posts:user:{user.id}"
 
-    # Search Content/Title
+    # Search Content/Title through the full-text index
     if q:
-        query = query.filter(or_(Post.content.icontains(q), Post.title.icontains(q)))
+        query, rank = search.match_posts(query, q, db.get_bind().dialect.name)
+        # Any new or edited post may match, anywhere in the ranking
+        scope = "posts:search"
 
-    # Sorting
-    if sort == "created_at":
-        query = query.order_by(desc(Post.created_at))
-    # Note: likes_count requires a relationship or join (implemented later)
+    # Sorting + Pagination: by cursor or page
+    if q and sort in (None, "relevance"):
+        # Best match first on (rank, id)
+        rows, next_cursor = await paginate(
+            db, query.add_columns(rank.label("rank")), rank, Post.id, limit, cursor, page,
+            key=lambda row: (row.rank, row[0].id)
+        )
+        posts = [post for post, _ in rows]
+    elif sort == "hot":
+        # Hottest first on (hot_score, id); scores move, so pages may overlap a little
+        posts, next_cursor = await paginate(
+            db, query, Post.hot_score, Post.id, limit, cursor, page, key=lambda post: (post.hot_score, post.id)
+        )
+    elif sort == "top":
+        # Most liked first on (likes_count, id)
+        posts, next_cursor = await paginate(
+            db, query, Post.likes_count, Post.id, limit, cursor, page, key=lambda post: (post.likes_count, post.id)
+        )
+    else:
+        # Newest first on (created_at, id)
+        posts, next_cursor = await paginate(db, query, Post.created_at, Post.id, limit, cursor, page)
 
-    skip = (page - 1) * limit
-    return query.offset(skip).limit(limit).all()
+    tags = [scope] + [f"post:{post.id}" for post in posts]
+    # Offset pages shift when a post is added or removed before them;
+    # newest-first cursor pages start after a fixed post and only change
+    # through their own posts. A new post can rank anywhere in sort=hot or
+    # sort=top, so all of their pages shift (likes reorder them too, within
+    # RESPONSE_CACHE_TTL_SECONDS, like the counts on every cached page).
+    if scope != "posts:search" and (not cursor or sort in ("hot", "top")):
+        tags.append(f"{scope}:offset")
+    return posts, next_cursor, tags
+
+def _render_page(query_string: str, posts, next_cursor, tags) -> CachedResponse:
+    # Page ETag from the columns behind every field of the rows
+    etag = conditional.weak_etag(query_string, [
+        (post.id, post.updated_at, post.likes_count, post.comments_count, post.author.updated_at)
+        for post in posts
+    ])
+    return CachedResponse(
+        body=PostOutList.dump_json(PostOutList.validate_python(posts, from_attributes=True)),
+        headers=[(NEXT_CURSOR_HEADER, next_cursor)] if next_cursor else [],
+        etag=etag,
+        tags=tags
+    )
 
 # VIEW SINGLE POST
-@router.get("/{post_id}")
-def get_post(post_id: int, db: Session = Depends(get_db)):
-    post = db.query(Post).filter(Post.id == post_id).first()
+@router.get("/{post_id}", response_model=PostDetailOut)
+async def get_post(
+    post_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    # 1. Version lookup: one narrow row covering every field of the response
+    version = (await db.execute(
+        select(Post.updated_at, Post.likes_count, User.updated_at, *conditional.comments_version(post_id))
+        .outerjoin(User, User.id == Post.user_id)
+        .where(Post.id == post_id)
+    )).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Post not found")
+
+    # 2. The client's copy is current: no rows loaded, nothing serialized
+    etag = conditional.weak_etag(post_id, *version)
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified(etag)
+    conditional.set_validators(response, etag)
+
+    # 3. Full load
+    post = await db.get(Post, post_id, options=[
+        joinedload(Post.author),
+        # One extra query for all comments and their authors, not one per comment
+        selectinload(Post.comments).joinedload(Comment.user)
+    ])
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 # UPDATE POST (Owner Only)
-@router.patch("/{post_id}")
-def update_post(
+@router.patch("/{post_id}", response_model=PostOut)
+async def update_post(
     post_id: int, 
+    background_tasks: BackgroundTasks,
     content: str = Form(None),
     visibility: str = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id, options=[joinedload(Post.author)])
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     if post.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to edit this post")
     
+    was_shared = post.visibility in timeline.FOLLOWER_VISIBILITIES
+    was_public = post.visibility == "public"
     if content: post.content = content
     if visibility: post.visibility = visibility
+    is_shared = post.visibility in timeline.FOLLOWER_VISIBILITIES
+
+    # Keep followers' timelines in step with visibility changes
+    if was_shared and not is_shared:
+        await timeline.retract_post(db, post, keep_author=True)
     
-    db.commit()
-    db.refresh(post)
+    await db.commit()
+    await db.refresh(post)
+
+    if is_shared and not was_shared:
+        background_tasks.add_task(timeline.fan_out_post, post.id)
+
+    # Cached pages: pages holding the post, search results, and depending on
+    # the visibility change, pages it now enters or leaves
+    is_public = post.visibility == "public"
+    if was_public or is_public:
+        tags = [f"post:{post.id}", "posts:search"]
+        if is_public and not was_public:
+            # Lands at its created_at position, possibly on any page
+            tags += _listing_tags(post.user_id)
+        elif was_public and not is_public:
+            tags += _listing_tags(post.user_id, "offset")
+        await cache.invalidate(*tags)
     return post
 
 # DELETE POST (Owner or Admin)
-@router.delete("/{post_id}")
-def delete_post(
+@router.delete("/{post_id}", response_model=MessageOut)
+async def delete_post(
     post_id: int, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = await db.get(Post, post_id)
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -122,6 +299,10 @@ def delete_post(
     if post.user_id != current_user.id and current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
     
-    db.delete(post)
-    db.commit()
+    await timeline.retract_post(db, post)
+    await counters.bump(db, User, post.user_id, post_count=-1)
+    await db.delete(post)
+    await db.commit()
+    if post.visibility == "public":
+        await cache.invalidate(f"post:{post.id}", "posts:search", *_listing_tags(post.user_id, "offset"))
     return {"message": "Post deleted successfully"}
\ No newline at end of file
@@ -1,30 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db, get_read_db
 from app.db.models import User, Follow
 from app.core.security import get_current_user, check_admin
+from app.core.rate_limit import limit_by_user, charge_user
+from app.utils import timeline, counters, social_graph, conditional, export
+from app.utils.bulk import insert_ignore
+from app.utils.responses import json_response, ClosingStreamingResponse
+from app.schemas.user import (
+    UserOut, UserPublic, UserSummary, MessageOut, UserOutList, UserSummaryList, FollowBatchIn, FollowBatchResult
+)
+from typing import List, Literal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-@router.get("/admin/users", dependencies=[Depends(check_admin)])
-def list_all_users(db: Session = Depends(get_db)):
-    return db.query(User).all()
+@router.get("/admin/users", response_model=List[UserOut], dependencies=[Depends(check_admin)])
+async def list_all_users(db: AsyncSession = Depends(get_read_db)):
+    users = (await db.execute(select(User))).scalars().all()
+    return json_response(UserOutList, users)
 
-@router.get("/{username}")
-def get_profile(username: str, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.username == username).first()
+@router.post("/follow/batch", response_model=List[FollowBatchResult])
+async def follow_batch(
+    data: FollowBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Follow many users in one request and one transaction (e.g. onboarding
+    suggestions). Returns one status per username, in request order.
+    """
+    usernames = list(dict.fromkeys(data.usernames))
+    # Each username counts against the "follow" limit, as a single follow would
+    charge_user("follow", current_user, len(usernames))
+
+    # 1. Resolve all usernames in one query
+    targets = dict((await db.execute(
+        select(User.username, User.id).where(User.username.in_(usernames))
+    )).all())
+    to_follow = [user_id for user_id in targets.values() if user_id != current_user.id]
+
+    # 2. Insert the follows; existing ones are skipped by the unique constraint
+    followed = set()
+    if to_follow:
+        followed = set((await db.execute(
+            insert_ignore(db, Follow)
+            .values([{"follower_id": current_user.id, "following_id": user_id} for user_id in to_follow])
+            .returning(Follow.following_id)
+        )).scalars().all())
+
+    # 3. Counters and timeline backfill for the new follows only
+    if followed:
+        await counters.bump(db, User, current_user.id, following_count=len(followed))
+        await counters.bump_many(db, User, followed, follower_count=1)
+        await timeline.backfill_authors(db, current_user.id, followed)
+    await db.commit()
+    for user_id in followed:
+        social_graph.graph.add(current_user.id, user_id)
+
+    results = []
+    for username in usernames:
+        user_id = targets.get(username)
+        if user_id is None:
+            status = "not_found"
+        elif user_id == current_user.id:
+            status = "self"
+        elif user_id in followed:
+            status = "followed"
+        else:
+            status = "already_following"
+        results.append({"username": username, "status": status})
+    return results
+
+@router.get("/me/export", dependencies=[Depends(limit_by_user("export"))])
+async def export_account(
+    format: Literal["ndjson", "zip"] = Query("ndjson"),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Everything the caller owns (profile, posts, comments, likes, follows),
+    streamed as NDJSON or a zip of NDJSON files (see utils/export.py).
+    """
+    filename = f"{current_user.username}-export.{format}"
+    return ClosingStreamingResponse(
+        export.stream(db, current_user.id, format),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{username}", response_model=UserPublic)
+async def get_profile(
+    username: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
+):
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+
+    # The row is the version: edits move updated_at, counters don't
+    etag = conditional.weak_etag(
+        user.id, user.updated_at, user.follower_count, user.following_count, user.post_count
+    )
+    if conditional.is_not_modified(request, etag):
+        return conditional.not_modified(etag)
+    conditional.set_validators(response, etag)
     return user
 
-@router.post("/{username}/follow")
-def follow_user(
+@router.get("/{username}/mutuals", response_model=List[UserSummary])
+async def get_mutuals(username: str, db: AsyncSession = Depends(get_read_db)):
+    """Users that `username` follows and who follow them back."""
+    user = (await db.execute(select(User).where(User.username == username))).scalars().first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    if social_graph.enabled():
+        # Answered from memory; only the user rows come from the database
+        ids = social_graph.graph.mutuals(user.id)
+        stmt = select(User).where(User.id.in_(ids)) if ids else None
+    else:
+        follows_back = select(Follow.follower_id).where(Follow.following_id == user.id)
+        stmt = select(User).join(Follow, Follow.following_id == User.id).where(
+            Follow.follower_id == user.id,
+            Follow.following_id.in_(follows_back)
+        )
+    users = (await db.execute(stmt.order_by(User.id))).scalars().all() if stmt is not None else []
+    return json_response(UserSummaryList, users)
+
+@router.post("/{username}/follow", response_model=MessageOut, dependencies=[Depends(limit_by_user("follow"))])
+async def follow_user(
     username: str, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
     # 1. Find the target user
-    target_user = db.query(User).filter(User.username == username).first()
+    target_user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -35,55 +147,56 @@ def follow_user(
             detail="You cannot follow yourself"
         )
     
-    # 3. Check if already following (Idempotency)
-    follow_check = db.query(Follow).filter_by(
-        follower_id=current_user.id, 
-        following_id=target_user.id
-    ).first()
-    
-    if follow_check:
+    # 3. Create the follow; an existing one (or a concurrent duplicate) is skipped
+    followed = (await db.execute(
+        insert_ignore(db, Follow)
+        .values(follower_id=current_user.id, following_id=target_user.id)
+        .returning(Follow.following_id)
+    )).scalar()
+
+    if followed is None:
         # We return a 200/Success message because the end state (following) is already true
         return {"message": f"You are already following {username}"}
-    
-    # 4. Create new follow record
-    new_follow = Follow(follower_id=current_user.id, following_id=target_user.id)
-    db.add(new_follow)
-    db.commit()
+
+    await counters.bump(db, User, current_user.id, following_count=1)
+    await counters.bump(db, User, target_user.id, follower_count=1)
+
+    # 4. Backfill their recent posts into my timeline
+    await timeline.backfill_author(db, current_user.id, target_user.id)
+    await db.commit()
+    social_graph.graph.add(current_user.id, target_user.id)
     
     return {"message": f"Successfully followed {username}"}
 
-@router.delete("/{username}/unfollow")
-def unfollow_user(
+@router.delete("/{username}/unfollow", response_model=MessageOut, dependencies=[Depends(limit_by_user("follow"))])
+async def unfollow_user(
     username: str, 
-    db: Session = Depends(get_db), 
+    db: AsyncSession = Depends(get_async_db), 
     current_user: User = Depends(get_current_user)
 ):
     # 1. Find the target user
-    target_user = db.query(User).filter(User.username == username).first()
+    target_user = (await db.execute(select(User).where(User.username == username))).scalars().first()
     if not target_user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # 2. Check if the follow relationship exists
-    follow_record = db.query(Follow).filter_by(
-        follower_id=current_user.id, 
-        following_id=target_user.id
-    ).first()
-    
-    # Perform the counts here where 'db' is available
-    follower_count = db.query(Follow).filter(Follow.following_id == User.id).count()
-    following_count = db.query(Follow).filter(Follow.follower_id == User.id).count()
-
-    # Add the counts to the user object temporarily so the schema can see them
-    User.follower_count = follower_count
-    User.following_count = following_count
-    if not follow_record:
+    # 2. Remove the relationship, learning whether it existed
+    unfollowed = (await db.execute(
+        delete(Follow)
+        .where(Follow.follower_id == current_user.id, Follow.following_id == target_user.id)
+        .returning(Follow.following_id)
+    )).scalar()
+
+    if unfollowed is None:
         raise HTTPException(
             status_code=400, 
             detail=f"You are not following {username}"
         )
     
-    # 3. Remove the relationship
-    db.delete(follow_record)
-    db.commit()
+    # 3. Counters and their posts out of my timeline
+    await counters.bump(db, User, current_user.id, following_count=-1)
+    await counters.bump(db, User, target_user.id, follower_count=-1)
+    await timeline.prune_author(db, current_user.id, target_user.id)
+    await db.commit()
+    social_graph.graph.remove(current_user.id, target_user.id)
     
     return {"message": f"Successfully unfollowed {username}"}
\ No newline at end of file
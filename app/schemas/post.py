@@ -1,3 +1,9 @@
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+from typing import Optional, List
+from datetime import datetime
+from app.schemas.user import UserSummary
+from app.core.config import settings
+
 class CommentBase(BaseModel):
     content: str
 
@@ -6,6 +12,8 @@ class CommentOut(CommentBase):
     user_id: int
     post_id: int
     created_at: datetime
+    # Comment.user must be eager-loaded by the route
+    author: Optional[UserSummary] = Field(None, validation_alias="user")
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -24,6 +32,25 @@ class PostOut(PostBase):
     created_at: datetime
     updated_at: datetime
     likes_count: int = 0
+    comments_count: int = 0
+    # Post.author must be eager-loaded by the route
+    author: Optional[UserSummary] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class PostDetailOut(PostOut):
+    # Single post view only: lists never load comments
     comments: List[CommentOut] = []
 
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+class LikeBatchIn(BaseModel):
+    # Post ids to like and to unlike, applied in one transaction
+    like: List[int] = Field(default_factory=list, max_length=settings.BATCH_MAX_ITEMS)
+    unlike: List[int] = Field(default_factory=list, max_length=settings.BATCH_MAX_ITEMS)
+
+class LikeBatchResult(BaseModel):
+    post_id: int
+    status: str # liked | already_liked | unliked | not_liked | not_found
+
+# Built once at import, used by the list routes to go ORM -> JSON bytes in one pass
+PostOutList = TypeAdapter(List[PostOut])
+CommentOutList = TypeAdapter(List[CommentOut])
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional
+from pydantic import BaseModel, EmailStr, ConfigDict, Field, TypeAdapter
+from typing import Optional, List
 from datetime import datetime
+from app.core.config import settings
 
 class UserCreate(BaseModel):
     username: str
@@ -20,19 +21,68 @@ class UserOut(UserBase):
     role: str = "user"
     follower_count: int = 0
     following_count: int = 0
+    post_count: int = 0
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
 
+class UserPublic(BaseModel):
+    # What other users may see: no email, role or credentials
+    id: int
+    username: str
+    display_name: Optional[str] = None
+    bio: Optional[str] = None
+    avatar_url: Optional[str] = None
+    follower_count: int = 0
+    following_count: int = 0
+    post_count: int = 0
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class UserSummary(BaseModel):
+    # Embedded in posts and comments
+    id: int
+    username: str
+    avatar_url: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
 class Token(BaseModel):
     access_token: str
     refresh_token: str
     token_type: str = "bearer"
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 class UserUpdate(BaseModel):
     display_name: Optional[str] = None
     bio: Optional[str] = None
 
 class UserLogin(BaseModel):
     username_or_email: str
-    password: str
\ No newline at end of file
+    password: str
+
+class FollowBatchIn(BaseModel):
+    usernames: List[str] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+
+class FollowBatchResult(BaseModel):
+    username: str
+    status: str # followed | already_following | self | not_found
+
+class MessageOut(BaseModel):
+    message: str
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+    hit_ratio: float
+
+# Built once at import, used by the list routes to go ORM -> JSON bytes in one pass
+UserOutList = TypeAdapter(List[UserOut])
+UserPublicList = TypeAdapter(List[UserPublic])
+UserSummaryList = TypeAdapter(List[UserSummary])
@@ -105,4 +105,110 @@ def test_logout_valid_token(client):
     
     # 3. Logout
     response = client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_refresh_tokens_stored_as_digests(client, db_session):
+    import hashlib
+    from app.db.models import RefreshToken
+
+    client.post("/auth/register", json={"username": "digest", "email": "d@ex.com", "password": "password123"})
+    first = client.post("/auth/login", data={"username": "digest", "password": "password123"}).json()
+    second = client.post("/auth/login", data={"username": "digest", "password": "password123"}).json()
+    # Same user, same second: still two distinct tokens
+    assert first["refresh_token"] != second["refresh_token"]
+
+    stored = {row.token_hash for row in db_session.query(RefreshToken).all()}
+    assert stored == {hashlib.sha256(t["refresh_token"].encode()).hexdigest() for t in (first, second)}
+
+def test_refresh_by_token_and_revocation(client):
+    client.post("/auth/register", json={"username": "rotating", "email": "r@ex.com", "password": "password123"})
+    tokens = client.post("/auth/login", data={"username": "rotating", "password": "password123"}).json()
+
+    # No access token needed: that is the point of refreshing
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+    assert me.json()["username"] == "rotating"
+
+    assert client.post("/auth/refresh", json={"refresh_token": "forged"}).status_code == 401
+    client.post("/auth/logout", headers={"Authorization": f"Bearer {tokens['access_token']}"})
+    assert client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+def test_purge_expired_refresh_tokens(client, db_session):
+    from datetime import datetime, timedelta
+    from app.db.models import User, RefreshToken
+    from app.utils import token_store
+
+    client.post("/auth/register", json={"username": "purged", "email": "pg@ex.com", "password": "password123"})
+    user_id = db_session.query(User.id).filter(User.username == "purged").scalar()
+    now = datetime.utcnow()
+    db_session.add_all(
+        [RefreshToken(user_id=user_id, token_hash=f"{n:064x}", expires_at=now - timedelta(days=1)) for n in range(5)]
+        + [RefreshToken(user_id=user_id, token_hash="f" * 64, expires_at=now + timedelta(days=1))]
+    )
+    db_session.commit()
+    # Revoked through logout: expires right away
+    token = client.post("/auth/login", data={"username": "purged", "password": "password123"}).json()["access_token"]
+    client.post("/auth/logout", headers={"Authorization": f"Bearer {token}"})
+
+    assert token_store.purge_expired_sync(db_session, batch_size=2) == 6
+    assert [row.token_hash for row in db_session.query(RefreshToken).all()] == ["f" * 64]
+
+## --- Auth Cache ---
+
+def test_get_me_served_from_auth_cache(client, test_user_token):
+    from app.core.security import principal_cache
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.get("/auth/me", headers=headers)
+    hits_before = principal_cache.stats()["hits"]
+
+    # Warm cache: the user snapshot is reused instead of queried again
+    response = client.get("/auth/me", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["username"] == "tester"
+    assert principal_cache.stats()["hits"] == hits_before + 1
+
+def test_principal_cache_invalidated_on_role_change(client, db_session):
+    from app.db.models import User
+
+    client.post("/auth/register", json={"username": "promoted", "email": "pr@ex.com", "password": "password"})
+    token = client.post("/auth/login", data={"username": "promoted", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/auth/cache-stats", headers=headers).status_code == 403
+
+    # Promote through the ORM: the cached snapshot must not keep the old role
+    user = db_session.query(User).filter(User.username == "promoted").first()
+    user.role = "admin"
+    db_session.commit()
+
+    response = client.get("/auth/cache-stats", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["principals"]["size"] >= 1
+
+## --- Hashing Pool ---
+
+def test_login_rejected_fast_when_hashing_queue_full(client, monkeypatch):
+    from app.core import hashing
+
+    client.post("/auth/register", json={
+        "username": "busy", "email": "busy@example.com", "password": "password123"
+    })
+    # Pretend every worker and queue slot is taken
+    monkeypatch.setattr(hashing.pool, "pending", hashing.pool.workers + hashing.pool.queue_size)
+
+    response = client.post("/auth/login", data={"username": "busy", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(hashing.pool.retry_after)
+
+def test_outdated_bcrypt_cost_is_rehashed():
+    from passlib.hash import bcrypt
+    from app.core import hashing
+    from app.core.config import settings
+
+    # A hash made before BCRYPT_ROUNDS was changed
+    legacy_hash = bcrypt.using(rounds=settings.BCRYPT_ROUNDS + 1).hash("password123")
+    is_valid, new_hash = hashing._verify_and_update("password123", legacy_hash)
+    assert is_valid
+    assert new_hash and new_hash != legacy_hash
+    assert hashing.pwd_context.verify("password123", new_hash)
@@ -51,6 +51,12 @@ def test_get_comments_pagination(client, test_user_token):
     assert response.status_code == 200
     assert len(response.json()) == 1
 
+    # The next page can also be fetched by cursor
+    cursor = response.headers["X-Next-Cursor"]
+    next_page = client.get(f"/posts/{post_id}/comments", params={"limit": 1, "cursor": cursor})
+    assert [c["content"] for c in response.json() + next_page.json()] == ["C2", "C1"]
+    assert "X-Next-Cursor" not in next_page.headers
+
 # --- Delete Comment ---
 
 def test_delete_comment_owner_success(client, test_user_token):
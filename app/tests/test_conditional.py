@@ -0,0 +1,78 @@
+from app.db.query_stats import QUERY_COUNT_HEADER
+
+def _revalidate(client, path, etag, **kwargs):
+    return client.get(path, headers={"If-None-Match": etag}, **kwargs)
+
+def test_post_detail_etag(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Poll me"}, headers=headers).json()["id"]
+
+    first = client.get(f"/posts/{post_id}")
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    # Unchanged: 304, no body, answered from the version lookup alone
+    cached = _revalidate(client, f"/posts/{post_id}", etag)
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert cached.headers[QUERY_COUNT_HEADER] == "1"
+    # Strong form of the same tag and lists of tags match too
+    assert _revalidate(client, f"/posts/{post_id}", 'W/"other", ' + etag.removeprefix("W/")).status_code == 304
+
+    # Counters, comments and edits all produce a new version
+    seen = {etag}
+    for change in (
+        lambda: client.post(f"/like/{post_id}/like", headers=headers),
+        lambda: client.post(f"/posts/{post_id}/comments", json={"content": "Hi"}, headers=headers),
+        lambda: client.patch(f"/posts/{post_id}", data={"content": "Edited"}, headers=headers),
+    ):
+        change()
+        response = _revalidate(client, f"/posts/{post_id}", etag)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert etag not in seen
+        seen.add(etag)
+
+def test_comment_page_etag(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Thread"}, headers=headers).json()["id"]
+    client.post(f"/posts/{post_id}/comments", json={"content": "One"}, headers=headers)
+
+    etag = client.get(f"/posts/{post_id}/comments").headers["ETag"]
+    assert _revalidate(client, f"/posts/{post_id}/comments", etag).status_code == 304
+    # Another page size is another representation
+    assert _revalidate(client, f"/posts/{post_id}/comments", etag, params={"limit": 5}).status_code == 200
+
+    comment_id = client.post(f"/posts/{post_id}/comments", json={"content": "Two"}, headers=headers).json()["id"]
+    response = _revalidate(client, f"/posts/{post_id}/comments", etag)
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    etag = response.headers["ETag"]
+    client.delete(f"/comments/{comment_id}", headers=headers)
+    assert _revalidate(client, f"/posts/{post_id}/comments", etag).status_code == 200
+    assert client.get("/posts/99999/comments", headers={"If-None-Match": "*"}).status_code == 404
+
+def test_profile_etag(client, test_user_token):
+    etag = client.get("/users/tester").headers["ETag"]
+    assert _revalidate(client, "/users/tester", etag).status_code == 304
+
+    client.post("/auth/register", json={"username": "fan", "email": "fan@ex.com", "password": "password"})
+    token = client.post("/auth/login", data={"username": "fan", "password": "password"}).json()["access_token"]
+    client.post("/users/tester/follow", headers={"Authorization": f"Bearer {token}"})
+    response = _revalidate(client, "/users/tester", etag)
+    assert response.status_code == 200
+    assert response.json()["follower_count"] == 1
+
+def test_post_list_etag(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Listed"}, headers=headers).json()["id"]
+
+    etag = client.get("/posts/").headers["ETag"]
+    assert _revalidate(client, "/posts/", etag).status_code == 304
+    assert _revalidate(client, "/posts/", etag, params={"limit": 1}).status_code == 200
+
+    client.post(f"/like/{post_id}/like", headers=headers)
+    assert _revalidate(client, "/posts/", etag).status_code == 200
@@ -0,0 +1,100 @@
+import asyncio
+import io
+import json
+import zipfile
+from app import cli
+from app.core.config import settings
+from app.utils.responses import ClosingStreamingResponse
+
+def _account(client, token):
+    """tester: three posts, a comment, a like, one follow each way."""
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/auth/register", json={"username": "friend", "email": "f@f.com", "password": "password123"})
+    friend = client.post("/auth/login", data={"username": "friend", "password": "password123"}).json()["access_token"]
+    post_ids = [
+        client.post("/posts/", data={"content": f"Post {i}", "visibility": visibility}, headers=headers).json()["id"]
+        for i, visibility in enumerate(("public", "followers", "private"))
+    ]
+    client.post(f"/posts/{post_ids[0]}/comments", json={"content": "Note to self"}, headers=headers)
+    client.post(f"/like/{post_ids[0]}/like", headers=headers)
+    client.post("/users/friend/follow", headers=headers)
+    client.post("/users/tester/follow", headers={"Authorization": f"Bearer {friend}"})
+    return headers, post_ids
+
+def test_export_ndjson(client, test_user_token, monkeypatch):
+    headers, post_ids = _account(client, test_user_token)
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2) # Several partitions per section
+
+    response = client.get("/users/me/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="tester-export.ndjson"'
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["type"] == "profile"
+    assert lines[0]["data"]["username"] == "tester"
+    assert "password_hash" not in lines[0]["data"]
+    by_type = {}
+    for line in lines[1:]:
+        by_type.setdefault(line["type"], []).append(line["data"])
+    # Private posts are the owner's data too
+    assert [post["id"] for post in by_type["posts"]] == post_ids
+    assert [comment["content"] for comment in by_type["comments"]] == ["Note to self"]
+    assert [like["post_id"] for like in by_type["likes"]] == [post_ids[0]]
+    assert by_type["following"][0]["username"] == "friend"
+    assert by_type["followers"][0]["username"] == "friend"
+
+def test_export_zip(client, test_user_token):
+    headers, post_ids = _account(client, test_user_token)
+
+    response = client.get("/users/me/export", params={"format": "zip"}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == [
+        "profile.json", "posts.ndjson", "comments.ndjson", "likes.ndjson", "following.ndjson", "followers.ndjson"
+    ]
+    assert json.loads(archive.read("profile.json"))["username"] == "tester"
+    posts = [json.loads(line) for line in archive.read("posts.ndjson").splitlines()]
+    assert [post["id"] for post in posts] == post_ids
+
+def test_export_requires_auth(client, test_user_token):
+    assert client.get("/users/me/export").status_code == 401
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    assert client.get("/users/me/export", params={"format": "csv"}, headers=headers).status_code == 422
+
+def test_export_cli(client, test_user_token, tmp_path):
+    _account(client, test_user_token)
+    output = tmp_path / "tester.zip"
+    cli.main(["export", "tester", "--format", "zip", "--output", str(output)])
+    assert "posts.ndjson" in zipfile.ZipFile(output).namelist()
+
+def test_streaming_response_closes_on_disconnect():
+    """A client going away mid-body closes the generator (and the cursor it holds) right away."""
+    closed = []
+
+    async def body():
+        try:
+            for i in range(100):
+                yield b"chunk"
+        finally:
+            closed.append(True)
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            raise OSError("Connection reset")
+
+    async def receive():
+        return {"type": "http.request"}
+
+    async def run():
+        scope = {"type": "http", "asgi": {"spec_version": "2.4"}}
+        try:
+            await ClosingStreamingResponse(body())(scope, receive, send)
+        except Exception:
+            pass
+        # Checked inside the loop: asyncio.run finalizes leftover generators on exit
+        assert closed == [True]
+
+    asyncio.run(run())
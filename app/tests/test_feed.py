@@ -58,4 +58,77 @@ def test_feed_pagination(client, test_user_token):
         client.post("/posts/", data={"content": f"Post {i}"}, headers=headers)
     
     response = client.get("/feed/?limit=2&page=1", headers=headers)
-    assert len(response.json()) == 2
\ No newline at end of file
+    assert len(response.json()) == 2
+
+# --- Materialized Timeline ---
+
+def _author_and_reader(client):
+    """Registers 'author' and 'reader'. Returns their auth headers."""
+    headers = []
+    for name in ("author", "reader"):
+        client.post("/auth/register", json={"username": name, "email": f"{name}@ex.com", "password": "password"})
+        headers.append({"Authorization": "Bearer " + client.post(
+            "/auth/login", data={"username": name, "password": "password"}
+        ).json()["access_token"]})
+    return headers
+
+def test_feed_fan_out_and_unfollow_prune(client):
+    # 1. User A and User B; B follows A before A posts
+    headers_a, headers_b = _author_and_reader(client)
+    client.post("/users/author/follow", headers=headers_b)
+
+    # 2. New posts are fanned out to B's timeline
+    client.post("/posts/", data={"content": "Fresh A"}, headers=headers_a)
+    contents = [p["content"] for p in client.get("/feed/", headers=headers_b).json()]
+    assert contents == ["Fresh A"]
+
+    # 3. Unfollowing prunes A's posts from B's timeline
+    client.delete("/users/author/unfollow", headers=headers_b)
+    assert client.get("/feed/", headers=headers_b).json() == []
+
+def test_feed_retracts_private_and_deleted_posts(client):
+    headers_a, headers_b = _author_and_reader(client)
+    client.post("/users/author/follow", headers=headers_b)
+
+    hidden_id = client.post("/posts/", data={"content": "Going private"}, headers=headers_a).json()["id"]
+    deleted_id = client.post("/posts/", data={"content": "Going away"}, headers=headers_a).json()["id"]
+
+    # Switching to private removes it from B but keeps it in A's own feed
+    client.patch(f"/posts/{hidden_id}", data={"visibility": "private"}, headers=headers_a)
+    client.delete(f"/posts/{deleted_id}", headers=headers_a)
+
+    assert client.get("/feed/", headers=headers_b).json() == []
+    own = [p["content"] for p in client.get("/feed/", headers=headers_a).json()]
+    assert own == ["Going private"]
+
+    # Making it visible again fans it back out
+    client.patch(f"/posts/{hidden_id}", data={"visibility": "followers"}, headers=headers_a)
+    contents = [p["content"] for p in client.get("/feed/", headers=headers_b).json()]
+    assert contents == ["Going private"]
+
+def test_feed_backfill_and_fan_out_race(client, monkeypatch):
+    import asyncio
+    from sqlalchemy import select
+    from app.db.models import User
+    from app.db.session import AsyncSessionLocal
+    from app.utils import timeline
+
+    headers_a, headers_b = _author_and_reader(client)
+    post_id = client.post("/posts/", data={"content": "Raced"}, headers=headers_a).json()["id"]
+
+    # The follow backfills the post, as if it committed between the fan-out
+    # job's retraction and its INSERT; the fan-out must skip that row
+    client.post("/users/author/follow", headers=headers_b)
+    monkeypatch.setattr(timeline, "_retract_from_followers", lambda db, post: asyncio.sleep(0))
+    asyncio.run(timeline.fan_out_post(post_id))
+
+    # And the other way round: backfilling rows the fan-out already wrote
+    async def backfill():
+        async with AsyncSessionLocal() as db:
+            reader_id = (await db.execute(select(User.id).where(User.username == "reader"))).scalar_one()
+            author_id = (await db.execute(select(User.id).where(User.username == "author"))).scalar_one()
+            await timeline.backfill_author(db, reader_id, author_id)
+            await db.commit()
+    asyncio.run(backfill())
+
+    assert [p["content"] for p in client.get("/feed/", headers=headers_b).json()] == ["Raced"]
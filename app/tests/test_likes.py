@@ -64,4 +64,106 @@ def test_get_post_likes_list(client, test_user_token):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
     # Check if the list contains the user who liked it
-    assert len(response.json()) > 0
\ No newline at end of file
+    assert len(response.json()) > 0
+
+# --- Counters ---
+
+def test_likes_count_follows_like_and_unlike(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Count me"}, headers=headers).json()["id"]
+
+    client.post(f"/like/{post_id}/like", headers=headers)
+    client.post(f"/like/{post_id}/like", headers=headers) # Idempotent, no double count
+    client.post(f"/posts/{post_id}/comments", json={"content": "Nice"}, headers=headers)
+    post = client.get(f"/posts/{post_id}").json()
+    assert post["likes_count"] == 1
+    assert post["comments_count"] == 1
+
+    client.delete(f"/like/{post_id}/like", headers=headers)
+    assert client.get(f"/posts/{post_id}").json()["likes_count"] == 0
+
+def test_reconcile_repairs_counter_drift(client, test_user_token, db_session):
+    from app.db.models import Post
+    from app.utils import counters
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Drifted"}, headers=headers).json()["id"]
+    client.post(f"/like/{post_id}/like", headers=headers)
+
+    # Corrupt the counter behind the app's back
+    db_session.query(Post).filter(Post.id == post_id).update({"likes_count": 42})
+    db_session.commit()
+
+    posts_fixed, _ = counters.reconcile(db_session)
+    assert posts_fixed == 1
+    assert client.get(f"/posts/{post_id}").json()["likes_count"] == 1
+
+def test_like_batch(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    a, b, c = [client.post("/posts/", data={"content": f"Batch {n}"}, headers=headers).json()["id"] for n in range(3)]
+    client.post(f"/like/{a}/like", headers=headers)
+    client.post(f"/like/{c}/like", headers=headers)
+
+    response = client.post("/like/batch", json={"like": [a, b, 99999], "unlike": [c]}, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == [
+        {"post_id": a, "status": "already_liked"},
+        {"post_id": b, "status": "liked"},
+        {"post_id": 99999, "status": "not_found"},
+        {"post_id": c, "status": "unliked"},
+    ]
+    counts = {p["id"]: p["likes_count"] for p in client.get(f"/posts/?ids={a},{b},{c}").json()}
+    assert counts == {a: 1, b: 1, c: 0}
+
+    # Unliking something not liked is reported, not an error
+    assert client.post("/like/batch", json={"unlike": [c]}, headers=headers).json() == [
+        {"post_id": c, "status": "not_liked"}
+    ]
+
+def test_like_batch_rejects_conflicts_and_oversized(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    assert client.post("/like/batch", json={"like": [1], "unlike": [1]}, headers=headers).status_code == 400
+    assert client.post("/like/batch", json={"like": list(range(1000))}, headers=headers).status_code == 422
+
+def test_concurrent_likes_count_once(client, test_user_token):
+    import asyncio
+    import httpx
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Viral"}, headers=headers).json()["id"]
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*[ac.post(f"/like/{post_id}/like", headers=headers) for _ in range(10)])
+
+    responses = asyncio.run(burst())
+    assert {r.status_code for r in responses} == {200}
+    assert client.get(f"/posts/{post_id}").json()["likes_count"] == 1
+
+def test_like_write_behind(client, test_user_token, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    a, b, c = [client.post("/posts/", data={"content": f"Buffered {n}"}, headers=headers).json()["id"] for n in range(3)]
+    client.post(f"/like/{c}/like", headers=headers)
+
+    monkeypatch.setattr(settings, "LIKE_WRITE_BEHIND", True)
+    with TestClient(app) as buffered:
+        assert buffered.post(f"/like/{a}/like", headers=headers).status_code == 202
+        buffered.post(f"/like/{a}/like", headers=headers)
+        buffered.post(f"/like/{b}/like", headers=headers)
+        buffered.delete(f"/like/{b}/like", headers=headers)
+        # Already liked in the database: must not be counted twice
+        buffered.post(f"/like/{c}/like", headers=headers)
+        buffered.post("/like/99999/like", headers=headers)
+    # Leaving the client shuts the app down, which flushes the buffer
+
+    monkeypatch.setattr(settings, "LIKE_WRITE_BEHIND", False)
+    counts = {p["id"]: p["likes_count"] for p in client.get(f"/posts/?ids={a},{b},{c}").json()}
+    assert counts == {a: 1, b: 0, c: 1}
+    likers = client.get(f"/like/{a}/likes").json()
+    assert [u["username"] for u in likers] == ["tester"]
@@ -0,0 +1,45 @@
+import pytest
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(100))
+
+@pytest.fixture
+def image_url(client, test_user_token, tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    response = client.post("/posts/", data={"content": "Pic"}, files={"image": ("a.png", PNG, "image/png")}, headers=headers)
+    return "/" + response.json()["image_url"]
+
+def test_get_media(client, image_url):
+    response = client.get(image_url)
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["accept-ranges"] == "bytes"
+    assert "immutable" in response.headers["cache-control"]
+    # Strong ETag derived from the content hash in the file name
+    assert response.headers["etag"] == '"' + image_url.rsplit("/", 1)[-1].split(".")[0] + '"'
+
+def test_get_media_conditional(client, image_url):
+    first = client.get(image_url)
+
+    not_modified = client.get(image_url, headers={"If-None-Match": first.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == first.headers["etag"]
+
+    since = client.get(image_url, headers={"If-Modified-Since": first.headers["last-modified"]})
+    assert since.status_code == 304
+
+    changed = client.get(image_url, headers={"If-None-Match": '"something-else"'})
+    assert changed.status_code == 200
+
+def test_get_media_range(client, image_url):
+    response = client.get(image_url, headers={"Range": "bytes=0-7"})
+    assert response.status_code == 206
+    assert response.content == PNG[:8]
+    assert response.headers["content-range"] == f"bytes 0-7/{len(PNG)}"
+
+def test_get_media_not_found(client, image_url):
+    assert client.get("/uploads/missing.png").status_code == 404
+    assert client.get("/uploads/..%2Fapp%2Fmain.py").status_code == 404
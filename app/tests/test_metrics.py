@@ -0,0 +1,46 @@
+import re
+from app.core.metrics import Histogram
+
+def sample(text, series):
+    """Value of one exposition line, e.g. 'http_requests_total{method="GET",...}'."""
+    match = re.search("^" + re.escape(series) + r" (\S+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else 0.0
+
+def test_metrics_per_route(client):
+    ok = 'http_requests_total{method="GET",route="/posts/",status="200"}'
+    missing = 'http_requests_total{method="GET",route="/posts/{post_id}",status="404"}'
+    before = client.get("/metrics").text
+
+    client.get("/posts/")
+    client.get("/posts/")
+    client.get("/posts/9999")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    # Labelled by route template, not by raw path
+    assert sample(text, ok) - sample(before, ok) == 2
+    assert sample(text, missing) - sample(before, missing) == 1
+    assert 'route="/posts/9999"' not in text
+
+    count = 'http_request_duration_seconds_count{method="GET",route="/posts/"}'
+    assert sample(text, count) - sample(before, count) == 2
+    assert 'http_request_db_queries_bucket{method="GET",route="/posts/",le="+Inf"}' in text
+    assert 'http_requests_in_progress{method="GET",route="/metrics"} 1' in text
+    assert 'db_pool_size{pool="primary"}' in text
+
+def test_histogram_rendering():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, "/x")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP demo_seconds Demo.", "# TYPE demo_seconds histogram"]
+    assert lines[2:] == [
+        'demo_seconds_bucket{route="/x",le="0.1"} 1',
+        'demo_seconds_bucket{route="/x",le="1.0"} 3',
+        'demo_seconds_bucket{route="/x",le="+Inf"} 4',
+        'demo_seconds_sum{route="/x"} 4.25',
+        'demo_seconds_count{route="/x"} 4',
+    ]
@@ -28,6 +28,104 @@ def test_list_posts_pagination(client):
     assert response.status_code == 200
     assert isinstance(response.json(), list)
 
+def test_list_posts_cursor_pagination(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    for i in range(5):
+        client.post("/posts/", data={"content": f"Cursor {i}"}, headers=headers)
+
+    # Walk the listing two at a time using the opaque cursor
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/posts/", params=params)
+        assert response.status_code == 200
+        seen += [p["content"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert seen == [f"Cursor {i}" for i in reversed(range(5))]
+
+def test_list_posts_invalid_cursor(client):
+    response = client.get("/posts/?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_search_posts_ranked_phrase_and_prefix(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.post("/posts/", data={"title": "Pizza night", "content": "Best pizza in New York"}, headers=headers)
+    client.post("/posts/", data={"content": "York is lovely, and so is new pizza"}, headers=headers)
+    client.post("/posts/", data={"content": "Nothing to see here"}, headers=headers)
+    client.post("/posts/", data={"content": "Secret pizza", "visibility": "private"}, headers=headers)
+
+    # Ranked: the post with "pizza" in its title comes first; private posts never match
+    contents = [p["content"] for p in client.get("/posts/", params={"q": "pizza"}).json()]
+    assert contents == ["Best pizza in New York", "York is lovely, and so is new pizza"]
+
+    # Phrase query only matches adjacent words
+    contents = [p["content"] for p in client.get("/posts/", params={"q": '"new york"'}).json()]
+    assert contents == ["Best pizza in New York"]
+
+    # Prefix query
+    contents = [p["content"] for p in client.get("/posts/", params={"q": "lov*"}).json()]
+    assert contents == ["York is lovely, and so is new pizza"]
+
+def test_search_posts_cursor_pagination(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    for i in range(3):
+        client.post("/posts/", data={"content": f"Search page {i}"}, headers=headers)
+
+    first = client.get("/posts/", params={"q": "search", "limit": 2})
+    second = client.get("/posts/", params={"q": "search", "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    contents = {p["content"] for p in first.json() + second.json()}
+    assert contents == {f"Search page {i}" for i in range(3)}
+    assert "X-Next-Cursor" not in second.headers
+
+def test_get_post_detail_includes_comments(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Discuss"}, headers=headers).json()["id"]
+    client.post(f"/posts/{post_id}/comments", json={"content": "First"}, headers=headers)
+
+    detail = client.get(f"/posts/{post_id}").json()
+    assert [c["content"] for c in detail["comments"]] == ["First"]
+    assert detail["comments_count"] == 1
+    # Lists stay lean: no nested comments
+    assert "comments" not in client.get("/posts/").json()[0]
+
+def test_list_posts_reads_from_read_only_engine(client, read_engine):
+    import asyncio
+    from sqlalchemy import event, text
+    from sqlalchemy.exc import DBAPIError
+
+    statements = []
+    def _capture(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(read_engine.sync_engine, "before_cursor_execute", _capture)
+    try:
+        assert client.get("/posts/").status_code == 200
+    finally:
+        event.remove(read_engine.sync_engine, "before_cursor_execute", _capture)
+    assert any("FROM posts" in s for s in statements)
+
+    # Writes on the read engine are refused by the database
+    async def write():
+        async with read_engine.connect() as conn:
+            await conn.execute(text("UPDATE posts SET title = 'x'"))
+    with pytest.raises(DBAPIError):
+        asyncio.run(write())
+
+def test_list_posts_by_ids(client, test_user_token):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    a, b = [client.post("/posts/", data={"content": f"Hydrate {n}"}, headers=headers).json()["id"] for n in range(2)]
+    hidden = client.post("/posts/", data={"content": "Mine", "visibility": "private"}, headers=headers).json()["id"]
+
+    # Request order is kept; unknown and non-public ids are dropped
+    response = client.get(f"/posts/?ids={b},{a},99999,{hidden}")
+    assert [p["id"] for p in response.json()] == [b, a]
+    assert response.json()[0]["author"]["username"] == "tester"
+
+    assert client.get("/posts/?ids=1,x").status_code == 422
+    assert client.get("/posts/?ids=" + ",".join(str(n) for n in range(1, 200))).status_code == 422
+
 def test_get_post_by_id_not_found(client):
     response = client.get("/posts/99999")
     assert response.status_code == 404
@@ -68,6 +166,47 @@ def test_update_post_forbidden_for_non_owner(client, test_user_token, db_session
     response = client.patch(f"/posts/{post_id}", json={"title": "Hacked"}, headers=headers_b)
     assert response.status_code == 403
 
+# --- Image Uploads ---
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 1024)
+    return tmp_path
+
+def test_create_post_with_image(client, test_user_token, upload_dir):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    files = {"image": ("cat.png", PNG, "image/png")}
+    first = client.post("/posts/", data={"content": "Cat"}, files=files, headers=headers)
+    second = client.post("/posts/", data={"content": "Same cat"}, files=files, headers=headers)
+    assert first.status_code == 200
+
+    # Stored under its content hash, so identical images share one file
+    image_url = first.json()["image_url"]
+    assert image_url.startswith("uploads/") and image_url.endswith(".png")
+    assert second.json()["image_url"] == image_url
+    assert [p.name for p in upload_dir.iterdir()] == [image_url.split("/")[-1]]
+
+def test_create_post_rejects_bad_images(client, test_user_token, upload_dir):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    # Declared as an image, but the bytes aren't one
+    fake = client.post("/posts/", data={"content": "x"}, files={"image": ("a.png", b"hello", "image/png")}, headers=headers)
+    assert fake.status_code == 415
+    # Over the size limit
+    big = client.post("/posts/", data={"content": "x"}, files={"image": ("a.png", PNG * 20, "image/png")}, headers=headers)
+    assert big.status_code == 413
+
+    # Far over the limit: refused from Content-Length before the body is read
+    huge = client.post("/posts/", data={"content": "x"}, files={"image": ("a.png", PNG * 1000, "image/png")}, headers=headers)
+    assert huge.status_code == 413
+
+    # No post was created and no partial file left behind
+    assert client.get("/posts/").json() == []
+    assert list(upload_dir.iterdir()) == []
+
 # --- Delete ---
 
 def test_delete_post_success(client, test_user_token):
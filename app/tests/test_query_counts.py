@@ -0,0 +1,46 @@
+import pytest
+from app.db.query_stats import QUERY_COUNT_HEADER
+
+# N+1 regression suite: list endpoints must run the same number of queries
+# whatever the page size (see the assert_constant_queries fixture).
+
+PAGE = 10
+
+@pytest.fixture
+def busy_post(client, test_user_token):
+    """PAGE posts by 'tester', the last one with PAGE comments and PAGE likes from other users."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    for i in range(PAGE):
+        post_id = client.post("/posts/", data={"content": f"Post {i}"}, headers=headers).json()["id"]
+
+    for i in range(PAGE):
+        client.post("/auth/register", json={"username": f"reader{i}", "email": f"r{i}@ex.com", "password": "password"})
+        token = client.post("/auth/login", data={"username": f"reader{i}", "password": "password"}).json()["access_token"]
+        reader = {"Authorization": f"Bearer {token}"}
+        client.post(f"/posts/{post_id}/comments", json={"content": f"Comment {i}"}, headers=reader)
+        client.post(f"/like/{post_id}/like", headers=reader)
+    return {"post_id": post_id, "headers": headers}
+
+def test_list_posts_constant_queries(busy_post, assert_constant_queries):
+    assert_constant_queries("/posts/", sizes=(1, PAGE))
+    assert_constant_queries("/posts/", sizes=(1, PAGE), params={"q": "post"})
+
+def test_feed_constant_queries(busy_post, assert_constant_queries):
+    assert_constant_queries("/feed/", headers=busy_post["headers"], sizes=(1, PAGE))
+
+def test_comments_constant_queries(busy_post, assert_constant_queries):
+    assert_constant_queries(f"/posts/{busy_post['post_id']}/comments", sizes=(1, PAGE))
+
+def test_likers_constant_queries(busy_post, assert_constant_queries):
+    assert_constant_queries(f"/like/{busy_post['post_id']}/likes", sizes=(1, PAGE))
+
+def test_post_detail_constant_queries(client, busy_post):
+    headers = busy_post["headers"]
+    quiet_id = client.post("/posts/", data={"content": "No comments"}, headers=headers).json()["id"]
+    client.post(f"/posts/{quiet_id}/comments", json={"content": "Only one"}, headers=headers)
+
+    quiet = client.get(f"/posts/{quiet_id}")
+    busy = client.get(f"/posts/{busy_post['post_id']}")
+    assert len(busy.json()["comments"]) == PAGE
+    assert busy.json()["comments"][0]["author"]["username"].startswith("reader")
+    assert busy.headers[QUERY_COUNT_HEADER] == quiet.headers[QUERY_COUNT_HEADER]
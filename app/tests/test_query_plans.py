@@ -0,0 +1,105 @@
+import re
+import pytest
+from app.tests.conftest import engine
+
+# Query plan regression suite: each test drives a hot endpoint, picks the
+# SQL it sent out of `captured_sql` and EXPLAINs it against the test
+# database. A full table scan or an explicit sort step fails the test, so a
+# missing index (or a query that stopped matching one) breaks the build.
+#
+# The test tables are tiny, so the planner is told to avoid seq scans and
+# sorts whenever an index can do the job; they only show up in the plan
+# when no usable index exists.
+
+PG_BAD_NODE = re.compile(r"\b(Seq Scan|Sort)\b")
+
+def explain(statement, parameters):
+    """Return the plan of a captured statement as a list of lines."""
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            conn.exec_driver_sql("SET enable_seqscan = off")
+            conn.exec_driver_sql("SET enable_sort = off")
+            rows = conn.exec_driver_sql("EXPLAIN " + statement, parameters).all()
+            conn.rollback()
+            return [row[0] for row in rows]
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return [row[-1] for row in rows]
+
+def bad_steps(plan):
+    if engine.dialect.name == "postgresql":
+        return [line for line in plan if PG_BAD_NODE.search(line)]
+    # SQLite: "SCAN t" walks the whole table, "USE TEMP B-TREE" is a sort
+    return [line for line in plan if line.startswith("SCAN") or "TEMP B-TREE" in line]
+
+def assert_indexed(captured_sql, *fragments):
+    """EXPLAIN the last captured statement containing every fragment."""
+    matches = [(s, p) for s, p in captured_sql if all(f in s for f in fragments)]
+    assert matches, f"No query containing {fragments} was executed"
+    plan = explain(*matches[-1])
+    assert not bad_steps(plan), "\n".join([matches[-1][0], ""] + plan)
+
+@pytest.fixture
+def seeded(client, test_user_token):
+    """One post by 'tester' with a comment and a like, plus a follower ('fan')."""
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Hot path"}, headers=headers).json()["id"]
+    client.post(f"/posts/{post_id}/comments", json={"content": "Nice"}, headers=headers)
+    client.post(f"/like/{post_id}/like", headers=headers)
+
+    client.post("/auth/register", json={"username": "fan", "email": "fan@ex.com", "password": "password"})
+    fan_token = client.post("/auth/login", data={"username": "fan", "password": "password"}).json()["access_token"]
+    client.post("/users/tester/follow", headers={"Authorization": f"Bearer {fan_token}"})
+    return {"post_id": post_id, "headers": headers, "fan_headers": {"Authorization": f"Bearer {fan_token}"}}
+
+def test_plan_list_public_posts(client, seeded, captured_sql):
+    first = client.get("/posts/", params={"limit": 1})
+    client.get("/posts/", params={"limit": 1, "cursor": first.headers.get("X-Next-Cursor", "")})
+    assert_indexed(captured_sql, "FROM posts", "posts.visibility =", "ORDER BY")
+
+def test_plan_list_posts_by_author(client, seeded, captured_sql):
+    client.get("/posts/", params={"username": "tester"})
+    assert_indexed(captured_sql, "FROM posts", "posts.user_id =", "ORDER BY")
+
+def test_plan_trending(client, seeded, captured_sql):
+    client.get("/posts/trending")
+    assert_indexed(captured_sql, "FROM posts", "ORDER BY posts.hot_score")
+
+def test_plan_top_posts(client, seeded, captured_sql):
+    client.get("/posts/", params={"sort": "top"})
+    assert_indexed(captured_sql, "FROM posts", "ORDER BY posts.likes_count")
+
+def test_plan_feed(client, seeded, captured_sql):
+    client.get("/feed/", headers=seeded["fan_headers"])
+    assert_indexed(captured_sql, "JOIN timelines", "ORDER BY")
+
+def test_plan_comments(client, seeded, captured_sql):
+    client.get(f"/posts/{seeded['post_id']}/comments")
+    assert_indexed(captured_sql, "FROM comments", "ORDER BY")
+
+def test_plan_post_likers(client, seeded, captured_sql):
+    client.get(f"/like/{seeded['post_id']}/likes")
+    assert_indexed(captured_sql, "JOIN likes", "ORDER BY")
+
+def test_plan_fan_out(client, seeded, captured_sql):
+    client.post("/posts/", data={"content": "Fan me out"}, headers=seeded["headers"])
+    assert_indexed(captured_sql, "INSERT INTO timelines", "FROM follows")
+
+def test_plan_logout(client, seeded, captured_sql):
+    client.post("/auth/logout", headers=seeded["headers"])
+    assert_indexed(captured_sql, "FROM refresh_tokens", "revoked_at IS NULL")
+
+def test_plan_refresh(client, seeded, captured_sql):
+    tokens = client.post("/auth/login", data={"username": "fan", "password": "password"}).json()
+    client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert_indexed(captured_sql, "FROM refresh_tokens", "token_hash =")
+
+def test_plan_token_purge(client, seeded, captured_sql):
+    import asyncio
+    from app.db.session import AsyncSessionLocal
+    from app.utils import token_store
+
+    async def purge():
+        async with AsyncSessionLocal() as db:
+            await token_store.purge_expired(db)
+    asyncio.run(purge())
+    assert_indexed(captured_sql, "DELETE FROM refresh_tokens")
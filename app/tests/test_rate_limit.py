@@ -0,0 +1,89 @@
+import pytest
+from app.core.config import settings
+from app.core import rate_limit
+from app.core.rate_limit import TokenBucketLimiter, parse_limit
+
+@pytest.fixture
+def limits(monkeypatch):
+    """Turn rate limiting on with the given per-route limits."""
+    def apply(**routes):
+        monkeypatch.setattr(settings, "RATE_LIMIT_ENABLED", True)
+        monkeypatch.setattr(settings, "RATE_LIMITS", routes)
+    return apply
+
+def test_parse_limit():
+    assert parse_limit("10/minute") == (10, 60.0)
+    assert parse_limit("100 / 5 minutes") == (100, 300.0)
+    with pytest.raises(ValueError):
+        parse_limit("lots")
+
+def test_token_bucket_refills_and_evicts(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    limiter = TokenBucketLimiter(max_keys=2)
+
+    assert [limiter.acquire("a", 2, 60) for _ in range(2)] == [0, 0]
+    assert limiter.acquire("a", 2, 60) == pytest.approx(30)
+    now[0] += 30 # One token back
+    assert limiter.acquire("a", 2, 60) == 0
+    assert limiter.acquire("a", 2, 60) > 0
+
+    # Least recently used keys go first; they come back with a full bucket
+    limiter.acquire("b", 2, 60)
+    limiter.acquire("c", 2, 60)
+    assert "a" not in limiter._buckets and len(limiter._buckets) == 2
+
+def test_login_limited_per_ip(client, limits):
+    limits(login="3/minute")
+    attempts = [client.post("/auth/login", data={"username": "nobody", "password": "x"}) for _ in range(4)]
+    assert [r.status_code for r in attempts] == [401, 401, 401, 429]
+    assert int(attempts[-1].headers["Retry-After"]) > 0
+    assert 'http_rate_limited_total{limit="login"}' in client.get("/metrics").text
+
+def test_forwarded_for_only_when_trusted(client, limits, monkeypatch):
+    limits(login="1/minute")
+    def login(ip):
+        return client.post("/auth/login", data={"username": "nobody", "password": "x"}, headers={"X-Forwarded-For": ip})
+
+    assert [login(ip).status_code for ip in ("1.1.1.1", "2.2.2.2")] == [401, 429]
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUST_FORWARDED", True)
+    assert [login(ip).status_code for ip in ("3.3.3.3", "4.4.4.4", "3.3.3.3")] == [401, 401, 429]
+
+    # A spoofed left-most entry doesn't buy a fresh bucket: the proxy's entry counts
+    assert login("9.9.9.9, 4.4.4.4").status_code == 429
+    # Behind two proxies the client is the second entry from the right
+    monkeypatch.setattr(settings, "RATE_LIMIT_PROXY_HOPS", 2)
+    assert [login(ip).status_code for ip in ("9.9.9.9, 5.5.5.5, 10.0.0.1", "8.8.8.8, 5.5.5.5, 10.0.0.1")] == [401, 429]
+    # Too few entries for the hops: keyed on the peer address (spent by the
+    # untrusted attempts above), not on a client-chosen entry
+    assert login("6.6.6.6").status_code == 429
+
+def test_likes_limited_per_user(client, test_user_token, limits):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Limited"}, headers=headers).json()["id"]
+    client.post("/auth/register", json={"username": "other", "email": "o@ex.com", "password": "password"})
+    other = client.post("/auth/login", data={"username": "other", "password": "password"}).json()["access_token"]
+
+    limits(like="2/minute")
+    assert client.post(f"/like/{post_id}/like", headers=headers).status_code == 200
+    assert client.delete(f"/like/{post_id}/like", headers=headers).status_code == 200
+    assert client.post(f"/like/{post_id}/like", headers=headers).status_code == 429
+    # Another user on the same IP has a bucket of their own
+    assert client.post(f"/like/{post_id}/like", headers={"Authorization": f"Bearer {other}"}).status_code == 200
+    # Unauthenticated requests are refused by auth, not counted
+    assert client.post(f"/like/{post_id}/like").status_code == 401
+
+def test_batches_pay_per_item(client, test_user_token, limits):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    ids = [client.post("/posts/", data={"content": f"Batch {n}"}, headers=headers).json()["id"] for n in range(3)]
+    for name in ("a", "b", "c"):
+        client.post("/auth/register", json={"username": name, "email": f"{name}@ex.com", "password": "password"})
+
+    limits(like="3/minute", follow="2/minute")
+    # Three ids drain the bucket: the next single like is refused
+    assert client.post("/like/batch", json={"like": ids[:2], "unlike": [ids[2]]}, headers=headers).status_code == 200
+    response = client.post(f"/like/{ids[2]}/like", headers=headers)
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) > 0
+    # A batch bigger than the bucket drains all of it
+    assert client.post("/users/follow/batch", json={"usernames": ["a", "b", "c"]}, headers=headers).status_code == 200
+    assert client.post("/users/follow/batch", json={"usernames": ["a"]}, headers=headers).status_code == 429
@@ -0,0 +1,144 @@
+import asyncio
+import httpx
+import pytest
+from app.core.config import settings
+from app.db.query_stats import QUERY_COUNT_HEADER
+
+@pytest.fixture
+def cached(monkeypatch):
+    monkeypatch.setattr(settings, "RESPONSE_CACHE_ENABLED", True)
+
+def _queries(response):
+    return int(response.headers[QUERY_COUNT_HEADER])
+
+def _ids(response):
+    return [post["id"] for post in response.json()]
+
+def test_listing_served_from_cache(client, test_user_token, cached):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    post_id = client.post("/posts/", data={"content": "Cached"}, headers=headers).json()["id"]
+
+    first = client.get("/posts/")
+    again = client.get("/posts/")
+    assert _queries(first) > 0
+    assert _queries(again) == 0
+    assert again.content == first.content
+    assert again.headers["ETag"] == first.headers["ETag"]
+    # Same parameters in another order: same entry
+    client.get("/posts/", params={"limit": 5, "page": 1})
+    assert _queries(client.get("/posts/", params={"page": 1, "limit": 5})) == 0
+    # Revalidation still works on cached pages
+    assert client.get("/posts/", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+    assert post_id in _ids(again)
+
+def test_post_writes_invalidate_affected_pages(client, test_user_token, cached):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    old = [client.post("/posts/", data={"content": f"Old {n}"}, headers=headers).json()["id"] for n in range(3)]
+
+    first_page = client.get("/posts/", params={"limit": 2})
+    cursor = first_page.headers["X-Next-Cursor"]
+    client.get("/posts/", params={"limit": 2, "cursor": cursor})
+    client.get("/posts/", params={"username": "tester"})
+
+    # A new public post: offset pages refresh, later cursor pages stay cached
+    new = client.post("/posts/", data={"content": "New"}, headers=headers).json()["id"]
+    assert _ids(client.get("/posts/", params={"limit": 2}))[0] == new
+    assert new in _ids(client.get("/posts/", params={"username": "tester"}))
+    assert _queries(client.get("/posts/", params={"limit": 2, "cursor": cursor})) == 0
+
+    # A private post changes nothing that is cached
+    client.post("/posts/", data={"content": "Hidden", "visibility": "private"}, headers=headers)
+    assert _queries(client.get("/posts/", params={"limit": 2})) == 0
+
+    # Edits reach every cached page showing the post, including cursor pages
+    client.patch(f"/posts/{old[0]}", data={"content": "Edited"}, headers=headers)
+    page = client.get("/posts/", params={"limit": 2, "cursor": cursor})
+    assert _queries(page) > 0
+    assert "Edited" in [post["content"] for post in page.json()]
+
+    # Going private and deleting both drop the post
+    client.get("/posts/", params={"ids": str(old[0])})
+    client.patch(f"/posts/{old[0]}", data={"visibility": "private"}, headers=headers)
+    client.delete(f"/posts/{old[2]}", headers=headers)
+    remaining = _ids(client.get("/posts/", params={"username": "tester"}))
+    assert old[0] not in remaining and old[2] not in remaining
+    assert _ids(client.get("/posts/", params={"limit": 2, "cursor": cursor})) == []
+    assert _ids(client.get("/posts/", params={"ids": str(old[0])})) == []
+
+    # ...and making it public again brings it back, wherever it sorts
+    client.patch(f"/posts/{old[0]}", data={"visibility": "public"}, headers=headers)
+    assert _ids(client.get("/posts/", params={"limit": 2, "cursor": cursor})) == [old[0]]
+    assert _ids(client.get("/posts/", params={"ids": str(old[0])})) == [old[0]]
+
+def test_concurrent_misses_share_one_query(client, test_user_token, cached, captured_sql):
+    from app.main import app
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.post("/posts/", data={"content": "Stampede"}, headers=headers)
+    captured_sql.clear()
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+            return await asyncio.gather(*[ac.get("/posts/", params={"q": "stampede"}) for _ in range(10)])
+
+    responses = asyncio.run(burst())
+    assert {len(r.json()) for r in responses} == {1}
+    assert len([s for s, _ in captured_sql if "FROM posts" in s]) == 1
+
+def test_shared_build_outlives_the_request_that_started_it(client, test_user_token, cached):
+    from sqlalchemy import func, select
+    from app.core.response_cache import cache, CachedResponse
+    from app.db.models import Post
+
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    client.post("/posts/", data={"content": "Outlived"}, headers=headers)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        async def build(db):
+            started.set()
+            await release.wait()
+            count = (await db.execute(select(func.count()).select_from(Post))).scalar()
+            return CachedResponse(body=str(count).encode(), tags=["posts"])
+
+        # The first caller goes away mid-build; the waiter behind it still gets the page
+        first = asyncio.create_task(cache.get_or_build("outlived", build))
+        await started.wait()
+        second = asyncio.create_task(cache.get_or_build("outlived", build))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return (await second).body
+    assert asyncio.run(run()) == b"1"
+
+def test_new_posts_invalidate_hot_cursor_pages(client, test_user_token, cached):
+    headers = {"Authorization": f"Bearer {test_user_token}"}
+    a, b, c = [client.post("/posts/", data={"content": f"Hot {n}"}, headers=headers).json()["id"] for n in range(3)]
+    for post_id in (a, b):
+        client.post(f"/like/{post_id}/like", headers=headers)
+
+    cursor = client.get("/posts/", params={"sort": "hot", "limit": 1}).headers["X-Next-Cursor"]
+    params = {"sort": "hot", "limit": 2, "cursor": cursor}
+    assert _ids(client.get("/posts/", params=params)) == [a, c]
+
+    # A new post outranks the unliked ones: it lands inside the cursor page
+    d = client.post("/posts/", data={"content": "Hot 3"}, headers=headers).json()["id"]
+    assert _ids(client.get("/posts/", params=params)) == [a, d]
+
+def test_tag_generations_expire_without_coming_back():
+    import time
+    from app.core.response_cache import MemoryBackend
+
+    backend = MemoryBackend(maxsize=10, ttl=0.05)
+
+    async def run():
+        await backend.bump(["post:1"])
+        recorded = await backend.generations(["post:1"])
+        # One TTL after the last bump the tag is gone, like every entry that saw it
+        time.sleep(0.06)
+        assert await backend.generations(["post:1"]) == {"post:1": 0}
+        # Bumped again, it never returns to the value it had
+        await backend.bump(["post:1"])
+        assert await backend.generations(["post:1"]) != recorded
+    asyncio.run(run())
@@ -0,0 +1,77 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.main import app
+from app.core import hashing, startup
+from app.core.config import settings
+from app.db.session import get_async_db
+
+ROOT = Path(__file__).resolve().parents[2]
+
+def test_import_does_no_io(tmp_path):
+    """Importing the app must not touch the database: any connection to this URL would fail."""
+    missing = tmp_path / "missing" / "app.db"
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{missing}"}
+    env.pop("READ_DATABASE_URL", None)
+    result = subprocess.run(
+        [sys.executable, "-c", "import app.main"], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    assert result.returncode == 0, result.stderr
+    assert not missing.parent.exists()
+
+def test_healthz(client):
+    response = client.get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+def test_readyz(client):
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "checks": {"database": "ok"}}
+
+def test_readyz_database_down(client, tmp_path):
+    broken = async_sessionmaker(create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'missing' / 'app.db'}"))
+
+    async def _broken_db():
+        async with broken() as session:
+            yield session
+    app.dependency_overrides[get_async_db] = _broken_db
+
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "unavailable"
+    assert response.json()["checks"]["database"].startswith("error")
+    # Liveness doesn't depend on the database
+    assert client.get("/healthz").status_code == 200
+
+def test_lifespan_warm_up(monkeypatch, read_engine):
+    monkeypatch.setattr(settings, "STARTUP_WARMUP", True)
+    monkeypatch.setattr(startup, "async_engine", read_engine)
+    monkeypatch.setattr(startup, "read_async_engine", read_engine)
+    steps = {}
+    warm_up = startup.warm_up
+
+    async def record(app=None):
+        steps.update(await warm_up(app))
+    monkeypatch.setattr(startup, "warm_up", record)
+
+    with TestClient(app) as client:
+        # Every step ran before the first request, and none failed
+        assert steps == {"mappers": None, "database_pool": None, "password_hashing": None, "openapi": None}
+        assert hashing.pool._executor is not None
+        body = client.get("/metrics").text
+        assert 'app_startup_seconds{phase="import"}' in body
+        assert 'app_startup_seconds{phase="warmup"}' in body
+
+def test_warm_up_failure_does_not_block_startup(monkeypatch):
+    monkeypatch.setattr(settings, "STARTUP_WARMUP", True)
+
+    async def unreachable():
+        raise ConnectionRefusedError("database is down")
+    monkeypatch.setattr(startup, "_warm_pools", unreachable)
+
+    with TestClient(app) as client:
+        assert client.get("/healthz").status_code == 200
@@ -0,0 +1,184 @@
+import asyncio
+import math
+from datetime import timedelta
+import pytest
+from sqlalchemy import select, update
+from app.db.models import Post, HotScoreState
+from app.db.session import AsyncSessionLocal
+from app.utils import hot_score
+
+@pytest.fixture
+def headers(test_user_token):
+    return {"Authorization": f"Bearer {test_user_token}"}
+
+@pytest.fixture
+def other_headers(client):
+    client.post("/auth/register", json={"username": "fan", "email": "fan@t.com", "password": "password123"})
+    token = client.post("/auth/login", data={"username": "fan", "password": "password123"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def scores(db_session):
+    db_session.expire_all()
+    return dict(db_session.execute(select(Post.id, Post.hot_score)).all())
+
+def epochs(db_session):
+    return dict(db_session.execute(select(Post.id, Post.hot_epoch)).all())
+
+def decay(now, **kwargs):
+    async def run():
+        async with AsyncSessionLocal() as db:
+            return await hot_score.decay(db, now, **kwargs)
+    return asyncio.run(run())
+
+def test_likes_and_comments_make_a_post_hot(client, headers, other_headers, db_session):
+    quiet, liked, discussed = [
+        client.post("/posts/", data={"content": f"Post {n}"}, headers=headers).json()["id"] for n in range(3)
+    ]
+    client.post(f"/like/{liked}/like", headers=headers)
+    client.post(f"/like/{liked}/like", headers=other_headers)
+    client.post(f"/posts/{discussed}/comments", json={"content": "First"}, headers=other_headers)
+    client.post(f"/posts/{discussed}/comments", json={"content": "Second"}, headers=headers)
+    client.post(f"/like/{discussed}/like", headers=headers)
+
+    # Comments weigh more than likes; the newest post wins ties at the bottom
+    assert [p["id"] for p in client.get("/posts/?sort=hot").json()] == [discussed, liked, quiet]
+    assert [p["id"] for p in client.get("/posts/trending").json()] == [discussed, liked, quiet]
+    assert [p["id"] for p in client.get("/posts/trending?limit=1").json()] == [discussed]
+
+    # Unlikes take back what the like added
+    before = scores(db_session)[liked]
+    client.delete(f"/like/{liked}/like", headers=other_headers)
+    assert scores(db_session)[liked] == pytest.approx(before - hot_score.LIKE_WEIGHT, abs=1e-3)
+
+def test_sort_hot_cursor_pagination(client, headers):
+    ids = [client.post("/posts/", data={"content": f"Page {n}"}, headers=headers).json()["id"] for n in range(5)]
+    for post_id in ids[:3]:
+        client.post(f"/like/{post_id}/like", headers=headers)
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/posts/", params={"sort": "hot", "limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [p["id"] for p in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == [ids[2], ids[1], ids[0], ids[4], ids[3]]
+
+def test_sort_top_orders_by_likes(client, headers, other_headers):
+    one, two, none = [client.post("/posts/", data={"content": f"Top {n}"}, headers=headers).json()["id"] for n in range(3)]
+    client.post(f"/like/{one}/like", headers=headers)
+    for h in (headers, other_headers):
+        client.post(f"/like/{two}/like", headers=h)
+    assert [p["id"] for p in client.get("/posts/?sort=top").json()] == [two, one, none]
+
+def test_trending_only_lists_public_posts(client, headers):
+    client.post("/posts/", data={"content": "Hidden", "visibility": "private"}, headers=headers)
+    assert client.get("/posts/trending").json() == []
+    assert client.get("/posts/trending?limit=0").status_code == 422
+
+def test_decay_rescales_scores_and_moves_the_epoch(client, headers, other_headers, db_session):
+    fresh, stale = [client.post("/posts/", data={"content": f"Decay {n}"}, headers=headers).json()["id"] for n in range(2)]
+    client.post(f"/like/{fresh}/like", headers=headers)
+    before = scores(db_session)
+
+    # One half-life later every score is halved, relative order intact
+    epoch = db_session.scalar(select(HotScoreState.epoch))
+    later = hot_score._now() + timedelta(hours=hot_score.settings.HOT_SCORE_HALF_LIFE_HOURS)
+    assert decay(later) == 2
+    after = scores(db_session)
+    factor = 2 ** -((later - epoch).total_seconds() / 3600 / hot_score.settings.HOT_SCORE_HALF_LIFE_HOURS)
+    for post_id in (fresh, stale):
+        assert after[post_id] == pytest.approx(before[post_id] * factor, rel=1e-6)
+    assert db_session.scalar(select(HotScoreState.epoch)) == later
+    assert set(epochs(db_session).values()) == {hot_score._unix(later)}
+    assert [p["id"] for p in client.get("/posts/trending").json()] == [fresh, stale]
+
+    # Likes after the decay are weighed against the new epoch
+    client.post(f"/like/{stale}/like", headers=headers)
+    assert scores(db_session)[stale] == pytest.approx(after[stale] + hot_score.weight_at(1, hot_score._now(), later))
+
+    # Long after, everything has faded to 0 and drops out of the decay pass
+    assert decay(later + timedelta(days=30)) == 2
+    assert set(scores(db_session).values()) == {0}
+    assert decay(later + timedelta(days=31)) == 0
+
+    # A post back from 0 starts over at the current epoch
+    client.post(f"/like/{fresh}/like", headers=other_headers)
+    assert epochs(db_session)[fresh] == hot_score._unix(later + timedelta(days=31))
+
+def test_decay_runs_in_batches_under_a_lease(client, headers, db_session):
+    ids = [client.post("/posts/", data={"content": f"Batch {n}"}, headers=headers).json()["id"] for n in range(3)]
+    later = hot_score._now() + timedelta(hours=1)
+    assert decay(later, batch_size=1) == 3
+    assert set(epochs(db_session).values()) == {hot_score._unix(later)}
+    assert db_session.scalar(select(HotScoreState.decay_claimed_until)) is None
+
+    # A live pass holds the lease: this one is turned away until it expires
+    def lease(until):
+        db_session.execute(update(HotScoreState).values(decay_claimed_until=until))
+        db_session.commit()
+    lease(hot_score._now() + timedelta(minutes=1))
+    assert decay(later + timedelta(hours=1)) is None
+    lease(hot_score._now() - timedelta(seconds=1))
+    assert decay(later + timedelta(hours=1)) == len(ids)
+
+def test_bumps_use_each_rows_epoch(client, headers, db_session):
+    a, b = [client.post("/posts/", data={"content": f"Mixed {n}"}, headers=headers).json()["id"] for n in range(2)]
+    # As if a pass had moved `a` but not yet `b`: same score, stated an hour earlier
+    hour = 3600
+    db_session.execute(update(Post).where(Post.id == b).values(
+        hot_score=Post.hot_score * 2 ** (hour / 3600 / hot_score.settings.HOT_SCORE_HALF_LIFE_HOURS),
+        hot_epoch=Post.hot_epoch - hour
+    ))
+    db_session.commit()
+    for post_id in (a, b):
+        client.post(f"/like/{post_id}/like", headers=headers)
+
+    # Both got the same like: the same score once expressed at one moment
+    now = hot_score._unix(hot_score._now())
+    rate = hot_score._decay_rate()
+    rows = db_session.execute(select(Post.id, Post.hot_score, Post.hot_epoch)).all()
+    value = {post_id: score * math.exp(rate * (epoch - now)) for post_id, score, epoch in rows}
+    assert value[a] == pytest.approx(value[b], rel=1e-3)
+
+def test_rebuild_matches_incremental_scores(client, headers, other_headers, db_session):
+    a, b = [client.post("/posts/", data={"content": f"Rebuild {n}"}, headers=headers).json()["id"] for n in range(2)]
+    client.post(f"/like/{a}/like", headers=other_headers)
+    client.post(f"/posts/{b}/comments", json={"content": "Hi"}, headers=other_headers)
+    now = hot_score._now()
+    decay(now)
+    incremental = scores(db_session)
+
+    db_session.query(Post).update({Post.hot_score: 0})
+    db_session.commit()
+    assert hot_score.rebuild(db_session, now) == 2
+    rebuilt = scores(db_session)
+    for post_id in (a, b):
+        assert rebuilt[post_id] == pytest.approx(incremental[post_id], rel=1e-6)
+
+def test_periodic_decay_runs_once_the_epoch_is_due(client, headers, db_session, monkeypatch, caplog):
+    client.post("/posts/", data={"content": "Due"}, headers=headers)
+    def age(hours):
+        db_session.execute(update(HotScoreState).values(epoch=hot_score._now() - timedelta(hours=hours)))
+        db_session.commit()
+
+    # The lifespan task decays straight away when the epoch is older than the interval
+    monkeypatch.setattr(hot_score.settings, "HOT_SCORE_DECAY_INTERVAL_SECONDS", 3600)
+    age(2)
+    async def run():
+        task = asyncio.create_task(hot_score.decay_periodically())
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if await hot_score._epoch_age() < timedelta(minutes=1):
+                break
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return await hot_score._epoch_age()
+    assert asyncio.run(run()) < timedelta(minutes=1)
+
+    # Without the task, a stale epoch at startup is reported
+    age(48)
+    with caplog.at_level("WARNING", logger=hot_score.logger.name):
+        asyncio.run(hot_score.warn_if_unscheduled())
+    assert "decay-hot-scores" in caplog.text
@@ -61,4 +61,90 @@ def test_unfollow_user_success(client):
 
     # Match router: DELETE /users/{username}/unfollow
     response = client.delete("/users/f2/unfollow", headers={"Authorization": f"Bearer {token}"})
-    assert response.status_code == 200
\ No newline at end of file
+    assert response.status_code == 200
+
+def test_follow_counters(client):
+    client.post("/auth/register", json={"username": "c1", "email": "c1@ex.com", "password": "password"})
+    client.post("/auth/register", json={"username": "c2", "email": "c2@ex.com", "password": "password"})
+    token = client.post("/auth/login", data={"username": "c1", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    client.post("/users/c2/follow", headers=headers)
+    client.post("/posts/", data={"content": "Counted"}, headers=headers)
+    assert client.get("/users/c1").json()["following_count"] == 1
+    assert client.get("/users/c1").json()["post_count"] == 1
+    assert client.get("/users/c2").json()["follower_count"] == 1
+
+    client.delete("/users/c2/unfollow", headers=headers)
+    assert client.get("/users/c2").json()["follower_count"] == 0
+
+def test_profile_hides_private_fields(client, test_user_token):
+    profile = client.get("/users/tester").json()
+    assert profile["username"] == "tester"
+    assert "email" not in profile
+    assert "password_hash" not in profile
+
+def test_follow_batch(client, db_session):
+    for name in ("b1", "b2", "b3"):
+        client.post("/auth/register", json={"username": name, "email": f"{name}@ex.com", "password": "password"})
+    token2 = client.post("/auth/login", data={"username": "b2", "password": "password"}).json()["access_token"]
+    client.post("/posts/", data={"content": "From b2"}, headers={"Authorization": f"Bearer {token2}"})
+
+    token = client.post("/auth/login", data={"username": "b1", "password": "password"}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.post("/users/b3/follow", headers=headers)
+
+    response = client.post("/users/follow/batch", json={"usernames": ["b2", "b3", "b1", "ghost"]}, headers=headers)
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()] == ["followed", "already_following", "self", "not_found"]
+
+    assert client.get("/users/b1").json()["following_count"] == 2
+    assert client.get("/users/b2").json()["follower_count"] == 1
+    assert client.get("/users/b3").json()["follower_count"] == 1
+    # b2's existing posts were backfilled into b1's timeline
+    assert [p["content"] for p in client.get("/feed/", headers=headers).json()] == ["From b2"]
+
+def _follow_ring(client):
+    """m1 <-> m2, m1 <-> m3, m1 -> m4. Returns m1's auth headers."""
+    tokens = {}
+    for name in ("m1", "m2", "m3", "m4"):
+        client.post("/auth/register", json={"username": name, "email": f"{name}@ex.com", "password": "password"})
+        tokens[name] = {"Authorization": "Bearer " + client.post(
+            "/auth/login", data={"username": name, "password": "password"}
+        ).json()["access_token"]}
+    client.post("/users/follow/batch", json={"usernames": ["m2", "m3", "m4"]}, headers=tokens["m1"])
+    client.post("/users/m1/follow", headers=tokens["m2"])
+    client.post("/users/m1/follow", headers=tokens["m3"])
+    return tokens["m1"]
+
+def test_mutuals(client):
+    _follow_ring(client)
+    assert [u["username"] for u in client.get("/users/m1/mutuals").json()] == ["m2", "m3"]
+    assert [u["username"] for u in client.get("/users/m4/mutuals").json()] == []
+    assert client.get("/users/ghost/mutuals").status_code == 404
+
+def test_social_graph_index(client, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.core.config import settings
+    from app.main import app
+    from app.utils.social_graph import graph
+
+    headers = _follow_ring(client)
+    ids = {u["username"]: u["id"] for u in client.get("/users/m1/mutuals").json()}
+
+    monkeypatch.setattr(settings, "SOCIAL_GRAPH_ENABLED", True)
+    with TestClient(app) as indexed:
+        # Loaded at startup
+        m1 = indexed.get("/users/m1").json()["id"]
+        assert list(graph.following_of(m1)) == sorted(graph.following_of(m1))
+        assert len(graph.following_of(m1)) == 3 and len(graph.followers_of(m1)) == 2
+        assert graph.follows(m1, ids["m2"]) and graph.follows(ids["m2"], m1)
+
+        # Kept in step with unfollows/follows, and serves /mutuals
+        indexed.delete("/users/m2/unfollow", headers=headers)
+        assert not graph.follows(m1, ids["m2"])
+        assert [u["username"] for u in indexed.get("/users/m1/mutuals").json()] == ["m3"]
+        indexed.post("/users/m2/follow", headers=headers)
+        assert graph.mutuals(m1) == sorted(ids.values())
+    # Shutdown drops the copy
+    assert not graph.loaded
@@ -0,0 +1,19 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Dialect-specific INSERT constructs that support ON CONFLICT
+INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def insert_ignore(db: AsyncSession, model):
+    """
+    INSERT ... ON CONFLICT DO NOTHING for the session's database. Add
+    .values([...]) for a multi-row insert and .returning(...) to learn which
+    rows were actually new (rows that hit a unique constraint are skipped).
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in INSERTS:
+        raise NotImplementedError(f"No conflict-ignoring insert for '{dialect}'")
+    return INSERTS[dialect](model).on_conflict_do_nothing()
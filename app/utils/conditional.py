@@ -0,0 +1,64 @@
+import hashlib
+from email.utils import parsedate_to_datetime
+from fastapi import Request, Response
+from sqlalchemy import select, func
+from app.db.models import Post, Comment, User
+
+# Conditional GET helpers. JSON resources get weak ETags built from the
+# columns behind their fields, looked up before the full rows are loaded
+# where possible; a matching If-None-Match is answered 304 with no body.
+
+# Clients may keep a copy but must revalidate it before every use
+REVALIDATE = "no-cache"
+
+def weak_etag(*parts) -> str:
+    """W/"..." over the repr of parts (ids, timestamps, counters, query strings)."""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+    return f'W/"{digest}"'
+
+def is_not_modified(request: Request, etag: str, last_modified: float = None) -> bool:
+    """
+    True when the client's copy is current. If-None-Match (weak comparison)
+    wins over If-Modified-Since when both are sent (RFC 9110 13.2.2), and
+    If-Modified-Since is only used when a reliable last_modified is known.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        opaque = etag.removeprefix("W/")
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or opaque in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(last_modified) <= since
+    return False
+
+def set_validators(response: Response, etag: str):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDATE
+
+def not_modified(etag: str, response: Response = None) -> Response:
+    """Empty 304 carrying the validators (and any headers set on `response`)."""
+    result = Response(status_code=304)
+    if response is not None:
+        result.headers.raw.extend(
+            (name, value) for name, value in response.headers.raw if name != b"content-length"
+        )
+    set_validators(result, etag)
+    return result
+
+def comments_version(post_id: int):
+    """
+    Scalar subqueries that change whenever a post's comment list does.
+    Comment ids only grow, so (count, newest id) changes on every add and
+    delete; the newest commenter update covers author names and avatars.
+    """
+    newest_comment = select(func.max(Comment.id)).where(Comment.post_id == post_id).scalar_subquery()
+    newest_author = select(func.max(User.updated_at)).join(
+        Comment, Comment.user_id == User.id
+    ).where(Comment.post_id == post_id).scalar_subquery()
+    return Post.comments_count, newest_comment, newest_author
@@ -0,0 +1,70 @@
+from sqlalchemy import update, select, func, or_, case
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import User, Post, Like, Comment, Follow
+
+async def bump(db: AsyncSession, model, row_id: int, **deltas):
+    """
+    Atomically add deltas to counter columns, e.g. await bump(db, Post, 1, likes_count=1).
+    Issues UPDATE ... SET col = col + n inside the caller's transaction,
+    so the counter commits (or rolls back) together with the row it counts.
+    """
+    values = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    # A counter change is not an edit: keep updated_at as it is
+    values["updated_at"] = model.updated_at
+    await db.execute(update(model).where(model.id == row_id).values(**values))
+
+async def bump_many(db: AsyncSession, model, row_ids, **deltas):
+    """Same as bump() for several rows in one UPDATE ... WHERE id IN (...)."""
+    if not row_ids:
+        return
+    values = {name: getattr(model, name) + delta for name, delta in deltas.items()}
+    values["updated_at"] = model.updated_at
+    await db.execute(update(model).where(model.id.in_(list(row_ids))).values(**values))
+
+async def bump_each(db: AsyncSession, model, column: str, deltas: dict):
+    """Different delta per row in one UPDATE, e.g. bump_each(db, Post, "likes_count", {1: 3, 2: -1})."""
+    deltas = {row_id: delta for row_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    values = {
+        column: getattr(model, column) + case(deltas, value=model.id, else_=0),
+        "updated_at": model.updated_at
+    }
+    await db.execute(update(model).where(model.id.in_(list(deltas))).values(**values))
+
+def reconcile(db: Session):
+    """
+    Recompute every counter from the source tables and fix rows that drifted.
+    Runs from the CLI on a sync session. Returns (posts_fixed, users_fixed).
+    """
+    likes = select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery()
+    comments = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    posts_fixed = db.execute(
+        update(Post)
+        .where(or_(Post.likes_count != likes, Post.comments_count != comments))
+        .values(likes_count=likes, comments_count=comments, updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    followers = select(func.count()).where(Follow.following_id == User.id).scalar_subquery()
+    following = select(func.count()).where(Follow.follower_id == User.id).scalar_subquery()
+    posts = select(func.count(Post.id)).where(Post.user_id == User.id).scalar_subquery()
+    users_fixed = db.execute(
+        update(User)
+        .where(or_(
+            User.follower_count != followers,
+            User.following_count != following,
+            User.post_count != posts
+        ))
+        .values(
+            follower_count=followers,
+            following_count=following,
+            post_count=posts,
+            updated_at=User.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    db.commit()
+    return posts_fixed, users_fixed
@@ -0,0 +1,99 @@
+import zipfile
+from pydantic_core import to_json
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import User, Post, Comment, Like, Follow
+
+# Complete data of one account, for GET /users/me/export and
+# `python -m app.cli export`. Every section is read with a server-side
+# cursor (AsyncSession.stream) in EXPORT_BATCH_SIZE partitions and each
+# partition is encoded and handed on before the next one is fetched, so
+# memory stays flat however large the account is.
+#
+# NDJSON: one {"type": section, "data": {...}} object per line, the
+# profile first. Zip: profile.json plus one <section>.ndjson per section.
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "zip": "application/zip"}
+
+PROFILE_COLUMNS = (
+    User.id, User.username, User.email, User.bio, User.avatar_url, User.role,
+    User.follower_count, User.following_count, User.post_count, User.created_at, User.updated_at
+)
+
+def sections(user_id: int):
+    """(section name, statement) pairs, each ordered by a key so the export is stable."""
+    return (
+        ("posts", select(
+            Post.id, Post.title, Post.content, Post.image_url, Post.visibility,
+            Post.likes_count, Post.comments_count, Post.created_at, Post.updated_at
+        ).where(Post.user_id == user_id).order_by(Post.id)),
+        ("comments", select(Comment.id, Comment.post_id, Comment.content, Comment.created_at)
+            .where(Comment.user_id == user_id).order_by(Comment.id)),
+        ("likes", select(Like.post_id, Like.created_at)
+            .where(Like.user_id == user_id).order_by(Like.id)),
+        ("following", select(User.username, Follow.created_at)
+            .join(User, User.id == Follow.following_id)
+            .where(Follow.follower_id == user_id).order_by(Follow.following_id)),
+        ("followers", select(User.username, Follow.created_at)
+            .join(User, User.id == Follow.follower_id)
+            .where(Follow.following_id == user_id).order_by(Follow.follower_id)),
+    )
+
+async def profile(db: AsyncSession, user_id: int):
+    return (await db.execute(select(*PROFILE_COLUMNS).where(User.id == user_id))).mappings().one()
+
+async def batches(db: AsyncSession, stmt):
+    """Row mappings of `stmt`, a partition at a time, from a server-side cursor."""
+    result = await db.stream(stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+    try:
+        async for partition in result.mappings().partitions():
+            yield partition
+    finally:
+        # Also reached when the client disconnects and the stream is closed
+        await result.close()
+
+def ndjson_lines(section: str, rows) -> bytes:
+    return b"".join(to_json({"type": section, "data": dict(row)}) + b"\n" for row in rows)
+
+async def stream_ndjson(db: AsyncSession, user_id: int):
+    yield ndjson_lines("profile", [await profile(db, user_id)])
+    for section, stmt in sections(user_id):
+        async for rows in batches(db, stmt):
+            yield ndjson_lines(section, rows)
+
+class _ZipSink:
+    """Write-only, unseekable file for ZipFile: collects output until drained."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+async def stream_zip(db: AsyncSession, user_id: int):
+    sink = _ZipSink()
+    # An unseekable target makes ZipFile use data descriptors, so entries
+    # don't need their size up front
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("profile.json", to_json(dict(await profile(db, user_id)), indent=2))
+        for section, stmt in sections(user_id):
+            with archive.open(f"{section}.ndjson", mode="w", force_zip64=True) as entry:
+                async for rows in batches(db, stmt):
+                    entry.write(b"".join(to_json(dict(row)) + b"\n" for row in rows))
+                    # The compressor holds small writes back: only send what it let out
+                    if sink.chunks:
+                        yield sink.drain()
+    yield sink.drain() # Rest of the last entry and the central directory
+
+def stream(db: AsyncSession, user_id: int, format: str):
+    return stream_zip(db, user_id) if format == "zip" else stream_ndjson(db, user_id)
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import math
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, case, func, or_, bindparam
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.models import Post, Like, Comment, HotScoreState
+from app.db.session import AsyncSessionLocal
+from app.utils.bulk import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+# Hot score of a post at time t: every event (the post itself, each like,
+# each comment) adds its weight, halved every HOT_SCORE_HALF_LIFE_HOURS:
+#
+#     score(t) = sum(weight * exp(-DECAY * (t - event_time)))
+#
+# posts.hot_score holds that sum as of the row's own hot_epoch,
+# score(epoch) = sum(weight * exp(DECAY * (event_time - epoch))). Time
+# scales every row by the same factor, so while rows share an epoch ORDER
+# BY hot_score is the hot ranking at any moment. A new event is one UPDATE
+# that weighs it against the row's epoch in SQL, and reads are an index
+# scan with no aggregation of likes.
+#
+# The stored values double every half-life the epoch falls behind (and
+# would overflow a float after ~500 days), so decay() moves every row to a
+# new epoch, HOT_SCORE_DECAY_BATCH_SIZE rows per transaction; rows that
+# fell below FLOOR go back to 0 and out of later passes. Rows a running
+# pass hasn't reached yet rank a little high (by the decay since the last
+# pass: 6% for hourly passes and a 12 hour half-life). Bumps never wait on
+# more than the row locks of one batch. By default every process runs a
+# pass once the epoch is HOT_SCORE_DECAY_INTERVAL_SECONDS old: the first
+# one due does it, and a lease on the state row turns away the others.
+# With the interval at 0, cron `python -m app.cli decay-hot-scores`.
+
+POST_WEIGHT = 1.0 # A new post starts out as hot as one fresh like
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+FLOOR = 0.01 # Decayed below this: back to 0, out of the decay pass
+LEASE = timedelta(minutes=5) # A pass that stops renewing its claim this long is presumed dead
+STALE = timedelta(days=1) # An epoch this old at startup: no pass is being scheduled
+
+def _decay_rate() -> float:
+    return math.log(2) / (settings.HOT_SCORE_HALF_LIFE_HOURS * 3600)
+
+def _naive_utc(moment: datetime) -> datetime:
+    """Columns are naive UTC; get_utc_now() and friends are aware."""
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def _unix(moment: datetime) -> float:
+    """posts.hot_epoch is Unix time, so SQL can do arithmetic on it on any database."""
+    return _naive_utc(moment).replace(tzinfo=timezone.utc).timestamp()
+
+def weight_at(weight: float, at: datetime, epoch: datetime) -> float:
+    """What an event of `weight` at `at` adds to a score stored as of `epoch`."""
+    return weight * math.exp(_decay_rate() * (_naive_utc(at) - _naive_utc(epoch)).total_seconds())
+
+async def current_epoch(db: AsyncSession) -> datetime:
+    """The epoch new scores start at (created on first use)."""
+    statement = select(HotScoreState.epoch).where(HotScoreState.id == 1)
+    epoch = (await db.execute(statement)).scalar()
+    if epoch is None:
+        await db.execute(insert_ignore(db, HotScoreState).values(id=1, epoch=_now()))
+        epoch = (await db.execute(statement)).scalar_one()
+    return epoch
+
+async def bump(db: AsyncSession, events):
+    """
+    Add (post_id, weight, event time) events to the scores, in the caller's
+    transaction; negative weights take an event back (an unlike, with the
+    time of the like). One UPDATE for all of them: each post's sum is moved
+    to the row's own hot_epoch, and posts at 0 start over at the current epoch.
+    """
+    now = _now()
+    sums = defaultdict(float)
+    for post_id, weight, at in events:
+        sums[post_id] += weight_at(weight, at or now, now)
+    sums = {post_id: total for post_id, total in sums.items() if total}
+    if not sums:
+        return
+    epoch = await current_epoch(db)
+
+    added = case(sums, value=Post.id, else_=0.0)
+    fresh = Post.hot_score == 0
+    await db.execute(
+        update(Post)
+        .where(Post.id.in_(list(sums)))
+        .values(
+            hot_score=case(
+                (fresh, added * weight_at(1, now, epoch)),
+                else_=Post.hot_score + added * func.exp(_decay_rate() * (_unix(now) - Post.hot_epoch))
+            ),
+            hot_epoch=case((fresh, _unix(epoch)), else_=Post.hot_epoch),
+            updated_at=Post.updated_at
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+async def initial(db: AsyncSession, created_at: datetime):
+    """(hot_score, hot_epoch) of a post created at `created_at`, before any engagement."""
+    epoch = await current_epoch(db)
+    return weight_at(POST_WEIGHT, created_at, epoch), _unix(epoch)
+
+async def _claim(db: AsyncSession, epoch: datetime) -> bool:
+    """Take the decay lease unless a live pass holds it, publishing its epoch. Commits."""
+    clock = _now()
+    await db.execute(insert_ignore(db, HotScoreState).values(id=1, epoch=epoch))
+    claimed = (await db.execute(
+        update(HotScoreState)
+        .where(
+            HotScoreState.id == 1,
+            or_(HotScoreState.decay_claimed_until.is_(None), HotScoreState.decay_claimed_until < clock)
+        )
+        .values(epoch=epoch, decay_claimed_until=clock + LEASE)
+    )).rowcount
+    await db.commit()
+    return bool(claimed)
+
+async def decay(db: AsyncSession, now: datetime = None, batch_size: int = None):
+    """
+    Move every score to `now` and make it the epoch, a batch of posts per
+    transaction. Returns the rows rescaled, or None when another pass holds
+    the lease.
+    """
+    now = _naive_utc(now or _now())
+    batch_size = batch_size or settings.HOT_SCORE_DECAY_BATCH_SIZE
+
+    # 1. Claim the pass. New scores start at the new epoch from here on.
+    if not await _claim(db, now):
+        return None
+
+    target = _unix(now)
+    decayed = Post.hot_score * func.exp(_decay_rate() * (Post.hot_epoch - target))
+    touched, last_id = 0, 0
+    try:
+        while True:
+            # 2. Next rows behind the epoch, walking the primary key
+            ids = (await db.execute(
+                select(Post.id)
+                .where(Post.id > last_id, Post.hot_score != 0, Post.hot_epoch != target)
+                .order_by(Post.id).limit(batch_size)
+            )).scalars().all()
+            if not ids:
+                break
+
+            # 3. Rescale them (bumps in between kept their own epoch), renew the lease
+            touched += (await db.execute(
+                update(Post)
+                .where(Post.id.in_(ids), Post.hot_epoch != target)
+                .values(
+                    hot_score=case((func.abs(decayed) < FLOOR, 0.0), else_=decayed),
+                    hot_epoch=target,
+                    updated_at=Post.updated_at
+                )
+                .execution_options(synchronize_session=False)
+            )).rowcount
+            await db.execute(
+                update(HotScoreState).where(HotScoreState.id == 1).values(decay_claimed_until=_now() + LEASE)
+            )
+            await db.commit()
+            last_id = ids[-1]
+    finally:
+        # Drops a failed batch; its rows are picked up by the next pass
+        await db.rollback()
+        await db.execute(update(HotScoreState).where(HotScoreState.id == 1).values(decay_claimed_until=None))
+        await db.commit()
+    return touched
+
+async def _epoch_age() -> timedelta:
+    async with AsyncSessionLocal() as db:
+        return _now() - await current_epoch(db)
+
+async def decay_periodically():
+    """
+    Lifespan task: decay whenever the epoch is HOT_SCORE_DECAY_INTERVAL_SECONDS
+    old, including right away after a long downtime. Safe in every process:
+    after a pass (or one skipped for another's lease) it waits a full interval.
+    """
+    interval = timedelta(seconds=settings.HOT_SCORE_DECAY_INTERVAL_SECONDS)
+    while True:
+        wait = interval
+        try:
+            age = await _epoch_age()
+            if age < interval:
+                wait = interval - age
+            else:
+                async with AsyncSessionLocal() as db:
+                    touched = await decay(db)
+                if touched is None:
+                    logger.info("Hot score decay skipped: another pass is running")
+                else:
+                    logger.info("Decayed hot scores of %d posts", touched)
+        except Exception:
+            logger.exception("Hot score decay failed")
+        await asyncio.sleep(wait.total_seconds())
+
+async def warn_if_unscheduled():
+    """At startup with the decay task off: warn when no pass has run for STALE."""
+    try:
+        age = await _epoch_age()
+    except Exception:
+        logger.exception("Could not read the hot score epoch")
+        return
+    if age > STALE:
+        logger.warning(
+            "No hot score decay pass for %s and HOT_SCORE_DECAY_INTERVAL_SECONDS=0: "
+            "run `python -m app.cli decay-hot-scores` from cron (scores overflow after ~500 days)", age
+        )
+
+def rebuild(db: Session, now: datetime = None) -> int:
+    """
+    Recompute every score from posts, likes and comments, as of `now`
+    (CLI, on a sync session; e.g. after the migration adding the column).
+    Events old enough to have decayed below FLOOR are not read. One
+    transaction, so don't run it during a decay pass.
+    Returns the number of posts with a non-zero score.
+    """
+    now = _naive_utc(now or _now())
+    db.execute(insert_ignore(db, HotScoreState).values(id=1, epoch=now))
+    db.execute(update(HotScoreState).where(HotScoreState.id == 1).values(epoch=now))
+
+    # 1. Sum the decayed weights of recent events, streamed
+    horizon = now - timedelta(hours=settings.HOT_SCORE_HALF_LIFE_HOURS * math.log2(COMMENT_WEIGHT / FLOOR))
+    scores = defaultdict(float)
+    for weight, stmt in (
+        (POST_WEIGHT, select(Post.id, Post.created_at).where(Post.created_at > horizon)),
+        (LIKE_WEIGHT, select(Like.post_id, Like.created_at).where(Like.created_at > horizon)),
+        (COMMENT_WEIGHT, select(Comment.post_id, Comment.created_at).where(Comment.created_at > horizon)),
+    ):
+        for post_id, at in db.execute(stmt.execution_options(yield_per=10000)):
+            scores[post_id] += weight_at(weight, at, now)
+
+    # 2. Reset everything, then write the scores in batches
+    posts = Post.__table__
+    db.execute(posts.update().where(posts.c.hot_score != 0).values(hot_score=0, updated_at=posts.c.updated_at))
+    rows = [{"row_id": post_id, "score": score} for post_id, score in scores.items() if score >= FLOOR]
+    statement = posts.update().where(posts.c.id == bindparam("row_id")).values(
+        hot_score=bindparam("score"), hot_epoch=_unix(now), updated_at=posts.c.updated_at
+    )
+    for start in range(0, len(rows), 1000):
+        db.execute(statement, rows[start:start + 1000])
+
+    db.commit()
+    return len(rows)
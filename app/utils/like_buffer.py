@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from collections import Counter
+from sqlalchemy import select, delete, tuple_
+from app.core.config import settings
+from app.db.models import Like, Post, get_utc_now
+from app.db.session import AsyncSessionLocal
+from app.utils import counters, hot_score
+from app.utils.bulk import insert_ignore
+
+logger = logging.getLogger(__name__)
+
+class LikeBuffer:
+    """
+    Write-behind for likes (LIKE_WRITE_BEHIND). Routes record the wanted end
+    state of each (user, post) pair and answer right away; a background task
+    writes everything pending every LIKE_FLUSH_INTERVAL_MS in one
+    transaction. Like/unlike/like from the same user collapses into a single
+    write, and a hot post gets one counter update per flush instead of one
+    per like. Uniqueness is still enforced by the database: the inserts skip
+    existing rows and the counters move by what was actually written.
+
+    Buffered operations are lost if the process dies before a flush, and
+    reads may lag behind by up to one flush interval.
+    """
+
+    def __init__(self, interval_ms: int, max_pending: int):
+        self.interval = interval_ms / 1000
+        self.max_pending = max_pending
+        self.pending = {} # (user_id, post_id) -> True (like) / False (unlike); only touched on the event loop
+        self._wake = None
+        self._task = None
+        self._stopping = False
+
+    def add(self, user_id: int, post_id: int, liked: bool):
+        self.pending[(user_id, post_id)] = liked
+        if len(self.pending) >= self.max_pending and self._wake is not None:
+            self._wake.set()
+
+    async def flush(self):
+        """Write everything pending. On failure the batch is put back (newer operations win)."""
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, {}
+        try:
+            async with AsyncSessionLocal() as db:
+                await self._write(db, batch)
+                await db.commit()
+        except Exception:
+            logger.exception("Flushing %d buffered likes failed, will retry", len(batch))
+            for key, liked in batch.items():
+                self.pending.setdefault(key, liked)
+
+    async def _write(self, db, batch):
+        # 1. Likes on posts deleted in the meantime are dropped
+        post_ids = {post_id for _, post_id in batch}
+        existing = set((await db.execute(select(Post.id).where(Post.id.in_(post_ids)))).scalars().all())
+
+        to_like = [key for key, liked in batch.items() if liked and key[1] in existing]
+        to_unlike = [key for key, liked in batch.items() if not liked and key[1] in existing]
+        deltas = Counter()
+        events = []
+        now = get_utc_now()
+
+        # 2. One multi-row insert; RETURNING only lists rows that were new
+        if to_like:
+            inserted = (await db.execute(
+                insert_ignore(db, Like)
+                .values([{"user_id": user_id, "post_id": post_id, "created_at": now} for user_id, post_id in to_like])
+                .returning(Like.post_id)
+            )).scalars().all()
+            deltas.update(inserted)
+            events += [(post_id, hot_score.LIKE_WEIGHT, now) for post_id in inserted]
+
+        # 3. One delete; RETURNING lists the likes that were really there
+        if to_unlike:
+            removed = (await db.execute(
+                delete(Like)
+                .where(tuple_(Like.user_id, Like.post_id).in_(to_unlike))
+                .returning(Like.post_id, Like.created_at)
+            )).all()
+            deltas.subtract(post_id for post_id, _ in removed)
+            events += [(post_id, -hot_score.LIKE_WEIGHT, liked_at) for post_id, liked_at in removed]
+
+        # 4. One hot score and one counter update for all touched posts
+        await hot_score.bump(db, events)
+        await counters.bump_each(db, Post, "likes_count", deltas)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write what is still pending."""
+        if self._task is not None:
+            # Let an in-flight flush finish rather than cancel it halfway
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._wake = None
+        await self.flush()
+
+buffer = LikeBuffer(
+    interval_ms=settings.LIKE_FLUSH_INTERVAL_MS,
+    max_pending=settings.LIKE_BUFFER_MAX
+)
@@ -0,0 +1,61 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from fastapi import HTTPException, status
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Header carrying the opaque cursor for the next page.
+# List endpoints keep returning plain JSON arrays for compatibility.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(sort_value, row_id: int) -> str:
+    """
+    Pack a (sort_value, id) key into an opaque, URL-safe token.
+    sort_value is a timestamp (created_at) or a number (e.g. a search rank).
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if isinstance(sort_value, str):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif not isinstance(sort_value, (int, float)):
+            raise TypeError("Unsupported cursor value")
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+async def paginate(db: AsyncSession, stmt, sort_col, id_col, limit: int, cursor: str = None,
+                   page: int = 1, key=lambda row: (row.created_at, row.id)):
+    """
+    Descending pagination of a select() on (sort_col, id_col), where
+    sort_col is usually created_at (newest first) or a ranking expression.
+
+    With a cursor this is a keyset seek, so every page costs the same as
+    the first one. Without one the legacy `page` OFFSET is used.
+    Either way one extra row is fetched to decide whether a next page
+    exists. Returns (rows, next_cursor or None); rows are entities when
+    the statement selects a single entity, Row tuples otherwise.
+    """
+    stmt = stmt.order_by(sort_col.desc(), id_col.desc())
+
+    if cursor:
+        after_value, after_id = decode_cursor(cursor)
+        stmt = stmt.where(tuple_(sort_col, id_col) < (after_value, after_id))
+    else:
+        stmt = stmt.offset((page - 1) * limit)
+
+    result = await db.execute(stmt.limit(limit + 1))
+    rows = result.scalars().all() if len(stmt.column_descriptions) == 1 else result.all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,52 @@
+import anyio
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+
+class FastJSONResponse(Response):
+    """
+    App-wide default response class. Bodies that are already JSON bytes (from
+    `json_response` below) are sent untouched; anything else is encoded by
+    pydantic-core's Rust serializer instead of the stdlib json module.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
+
+def json_response(adapter: TypeAdapter, data, response: Response = None, status_code: int = 200):
+    """
+    Validate ORM objects against a prebuilt TypeAdapter and dump them straight
+    to JSON bytes, skipping FastAPI's dict round-trip. Headers set on the
+    route's injected `response` (e.g. X-Next-Cursor) are carried over.
+    """
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return bytes_response(body, response, status_code)
+
+def bytes_response(body: bytes, response: Response = None, status_code: int = 200):
+    """Send an already encoded JSON body (e.g. from the response cache), keeping `response` headers."""
+    result = FastJSONResponse(body, status_code=status_code)
+    if response is not None:
+        result.headers.raw.extend(
+            (name, value) for name, value in response.headers.raw if name != b"content-length"
+        )
+    return result
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that always closes its generator, also when the client
+    goes away mid-body. A generator holding a database cursor then releases
+    it at once instead of whenever it is garbage collected.
+    """
+
+    async def stream_response(self, send) -> None:
+        try:
+            await super().stream_response(send)
+        finally:
+            if hasattr(self.body_iterator, "aclose"):
+                # Runs in a cancelled scope after a disconnect: shield the cleanup
+                with anyio.CancelScope(shield=True):
+                    await self.body_iterator.aclose()
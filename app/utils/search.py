@@ -0,0 +1,76 @@
+import re
+from sqlalchemy import func, literal_column, table, column, false, cast, Float
+from app.db.models import Post
+
+# Query syntax: plain words are ANDed, "quoted words" must appear as a
+# phrase and a trailing * makes a prefix match, e.g.  "new york" pizz*
+TOKEN_RE = re.compile(r'"([^"]*)"|(\S+)')
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+# SQLite FTS5 index created in app/db/models.py
+posts_fts = table("posts_fts", column("rowid"))
+
+def parse_query(q: str):
+    """
+    Split a user query into terms: ("phrase", [words]) or ("prefix", word).
+    Only \\w characters survive, so nothing can break out of the
+    tsquery / FTS5 syntax we generate.
+    """
+    terms = []
+    for quoted, bare in TOKEN_RE.findall(q):
+        words = WORD_RE.findall((quoted or bare).lower())
+        if not words:
+            continue
+        if bare and bare.endswith("*") and len(words) == 1:
+            terms.append(("prefix", words[0]))
+        else:
+            # Bare tokens like "e-mail" split into several words: keep them adjacent
+            terms.append(("phrase", words))
+    return terms
+
+def to_tsquery(terms) -> str:
+    parts = []
+    for kind, value in terms:
+        if kind == "prefix":
+            parts.append(f"{value}:*")
+        else:
+            parts.append("(" + " <-> ".join(value) + ")")
+    return " & ".join(parts)
+
+def to_fts5(terms) -> str:
+    parts = []
+    for kind, value in terms:
+        if kind == "prefix":
+            parts.append(f'"{value}"*')
+        else:
+            parts.append('"' + " ".join(value) + '"')
+    return " AND ".join(parts)
+
+def match_posts(stmt, q: str, dialect: str):
+    """
+    Restrict a select(Post) to posts matching `q`.
+    Returns (stmt, rank) where rank is a "higher is better" relevance
+    expression to sort on. Uses the tsvector GIN index on Postgres and
+    the FTS5 table on SQLite.
+    """
+    terms = parse_query(q)
+    if not terms:
+        return stmt.where(false()), literal_column("0")
+
+    if dialect == "postgresql":
+        search_vector = literal_column("posts.search_vector")
+        tsquery = func.to_tsquery("english", to_tsquery(terms))
+        # ts_rank_cd() is float4: widen it so cursor values round-trip exactly
+        rank = cast(func.ts_rank_cd(search_vector, tsquery), Float)
+        return stmt.where(search_vector.op("@@")(tsquery)), rank
+
+    if dialect == "sqlite":
+        # bm25() is "lower is better", so flip its sign
+        rank = -func.bm25(literal_column("posts_fts"))
+        stmt = stmt.join(posts_fts, posts_fts.c.rowid == Post.id).where(
+            literal_column("posts_fts").op("MATCH")(to_fts5(terms))
+        )
+        return stmt, rank
+
+    # Unknown backend: unranked substring match
+    return stmt.where(Post.content.icontains(q) | Post.title.icontains(q)), literal_column("0")
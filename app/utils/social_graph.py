@@ -0,0 +1,131 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.models import Follow
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+EMPTY = array("i")
+
+def _contains(ids: array, user_id: int) -> bool:
+    index = bisect_left(ids, user_id)
+    return index < len(ids) and ids[index] == user_id
+
+def _insert(index: dict, key: int, user_id: int):
+    ids = index.get(key)
+    if ids is None:
+        index[key] = array("i", [user_id])
+        return
+    position = bisect_left(ids, user_id)
+    if position == len(ids) or ids[position] != user_id:
+        ids.insert(position, user_id)
+
+def _remove(index: dict, key: int, user_id: int):
+    ids = index.get(key)
+    if ids is None:
+        return
+    position = bisect_left(ids, user_id)
+    if position < len(ids) and ids[position] == user_id:
+        del ids[position]
+        if not ids:
+            del index[key]
+
+class SocialGraph:
+    """
+    In-process copy of the follows table (SOCIAL_GRAPH_ENABLED): for every
+    user, the ids they follow and the ids following them, as sorted int32
+    arrays (4 bytes per edge and direction). Membership is a binary search.
+
+    The database stays the source of truth. Writes keep enforcing
+    uniqueness there and update this copy after they commit. The whole
+    graph is reloaded every SOCIAL_GRAPH_REFRESH_SECONDS, which picks up
+    follows made by other worker processes. So answers can be that stale:
+    use it for reads, never to decide a write.
+    """
+
+    def __init__(self):
+        self.following = {} # user_id -> array of followed ids
+        self.followers = {} # user_id -> array of follower ids
+        self.loaded = False
+        self._task = None
+
+    async def load(self):
+        """Build both indexes from one ordered scan of the follows table."""
+        following = defaultdict(lambda: array("i"))
+        followers = defaultdict(lambda: array("i"))
+        async with AsyncSessionLocal() as db:
+            rows = await db.stream(
+                select(Follow.follower_id, Follow.following_id)
+                .order_by(Follow.follower_id, Follow.following_id)
+                .execution_options(yield_per=10000)
+            )
+            async for follower_id, following_id in rows:
+                # Scan order keeps these sorted
+                following[follower_id].append(following_id)
+                followers[following_id].append(follower_id)
+        # Swap in whole: readers never see a half-built graph
+        self.following = dict(following)
+        self.followers = {user_id: array("i", sorted(ids)) for user_id, ids in followers.items()}
+        self.loaded = True
+
+    # Write hooks: no-ops until the graph is loaded
+    def add(self, follower_id: int, following_id: int):
+        if not self.loaded:
+            return
+        _insert(self.following, follower_id, following_id)
+        _insert(self.followers, following_id, follower_id)
+
+    def remove(self, follower_id: int, following_id: int):
+        if not self.loaded:
+            return
+        _remove(self.following, follower_id, following_id)
+        _remove(self.followers, following_id, follower_id)
+
+    def follows(self, follower_id: int, following_id: int) -> bool:
+        return _contains(self.following.get(follower_id, EMPTY), following_id)
+
+    def following_of(self, user_id: int) -> array:
+        return self.following.get(user_id, EMPTY)
+
+    def followers_of(self, user_id: int) -> array:
+        return self.followers.get(user_id, EMPTY)
+
+    def mutuals(self, user_id: int) -> list:
+        """Users that user_id follows and who follow back, ascending."""
+        following, followers = self.following_of(user_id), self.followers_of(user_id)
+        small, large = sorted((following, followers), key=len)
+        return [other for other in small if _contains(large, other)]
+
+    async def _refresh(self):
+        while True:
+            await asyncio.sleep(settings.SOCIAL_GRAPH_REFRESH_SECONDS)
+            try:
+                await self.load()
+            except Exception:
+                logger.exception("Reloading the social graph failed, keeping the previous copy")
+
+    async def start(self):
+        await self.load()
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.following, self.followers = {}, {}
+        self.loaded = False
+
+graph = SocialGraph()
+
+def enabled() -> bool:
+    return settings.SOCIAL_GRAPH_ENABLED and graph.loaded
@@ -0,0 +1,102 @@
+from sqlalchemy import select, delete, literal, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.db.models import Post, Follow, TimelineEntry
+from app.utils.bulk import insert_ignore
+
+# Posts with these visibilities are copied into followers' timelines.
+# Private posts only ever live in their author's own timeline.
+FOLLOWER_VISIBILITIES = ("public", "followers")
+
+def add_own_post(db: AsyncSession, post: Post):
+    """Put a freshly flushed post into its author's timeline (same transaction)."""
+    db.add(TimelineEntry(
+        user_id=post.user_id,
+        post_id=post.id,
+        author_id=post.user_id,
+        created_at=post.created_at
+    ))
+
+async def fan_out_post(post_id: int):
+    """
+    Background job: copy a post into the timeline of every follower of its author.
+    Runs after the response is sent, on its own session.
+    """
+    async with AsyncSessionLocal() as db:
+        post = await db.get(Post, post_id)
+        if not post or post.visibility not in FOLLOWER_VISIBILITIES:
+            return
+
+        # Clear any previous fan-out so the job is safe to re-run
+        await _retract_from_followers(db, post)
+
+        # One INSERT ... SELECT over the follows table, no follower list in Python.
+        # A follow committed meanwhile may have backfilled some of these rows.
+        followers = select(
+            Follow.follower_id,
+            literal(post.id),
+            literal(post.user_id),
+            literal(post.created_at)
+        ).where(Follow.following_id == post.user_id)
+
+        await db.execute(insert_ignore(db, TimelineEntry).from_select(
+            ["user_id", "post_id", "author_id", "created_at"], followers
+        ))
+        await db.commit()
+
+async def retract_post(db: AsyncSession, post: Post, keep_author: bool = False):
+    """Remove a post from timelines. keep_author=True is used when it goes private."""
+    if keep_author:
+        await _retract_from_followers(db, post)
+    else:
+        await db.execute(delete(TimelineEntry).where(TimelineEntry.post_id == post.id))
+
+async def _retract_from_followers(db: AsyncSession, post: Post):
+    await db.execute(delete(TimelineEntry).where(
+        TimelineEntry.post_id == post.id,
+        TimelineEntry.user_id != post.user_id
+    ))
+
+async def backfill_author(db: AsyncSession, follower_id: int, author_id: int):
+    """On follow: copy the author's most recent visible posts into the follower's timeline."""
+    await backfill_authors(db, follower_id, [author_id])
+
+async def backfill_authors(db: AsyncSession, follower_id: int, author_ids):
+    """
+    backfill_author() for several authors in one INSERT ... SELECT: each
+    author's posts are ranked newest first and the top N of each are copied.
+    """
+    if not author_ids:
+        return
+    ranked = select(
+        Post.id,
+        Post.user_id,
+        Post.created_at,
+        func.row_number().over(
+            partition_by=Post.user_id,
+            order_by=(Post.created_at.desc(), Post.id.desc())
+        ).label("rank")
+    ).where(
+        Post.user_id.in_(list(author_ids)),
+        Post.visibility.in_(FOLLOWER_VISIBILITIES)
+    ).subquery()
+
+    recent = select(
+        literal(follower_id),
+        ranked.c.id,
+        ranked.c.user_id,
+        ranked.c.created_at
+    ).where(ranked.c.rank <= settings.TIMELINE_BACKFILL_LIMIT)
+
+    # A fan-out job may have raced us to some of these rows: skip them
+    await db.execute(insert_ignore(db, TimelineEntry).from_select(
+        ["user_id", "post_id", "author_id", "created_at"], recent
+    ))
+
+async def prune_author(db: AsyncSession, follower_id: int, author_id: int):
+    """On unfollow: drop every post by the author from the follower's timeline."""
+    await db.execute(delete(TimelineEntry).where(
+        TimelineEntry.user_id == follower_id,
+        TimelineEntry.author_id == author_id
+    ))
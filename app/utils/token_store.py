@@ -0,0 +1,88 @@
+import asyncio
+import hashlib
+import logging
+import secrets
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, delete
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.security import create_token
+from app.db.models import RefreshToken
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Refresh tokens are stored as sha256 hex digests: fixed 64 chars whatever
+# the JWT length, and a leaked table can't be replayed.
+
+def digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _now():
+    # Columns are naive UTC
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def issue(db: AsyncSession, user_id: int) -> str:
+    """Create a refresh token for user_id and stage its row on `db`; returns the JWT."""
+    lifetime = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    # jti: two logins in the same second must still get distinct tokens
+    token = create_token({"sub": str(user_id), "jti": secrets.token_urlsafe(16)}, lifetime)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=digest(token),
+        expires_at=_now() + lifetime
+    ))
+    return token
+
+async def find_active(db: AsyncSession, token: str):
+    """The unrevoked, unexpired row for `token` (unique index lookup), or None."""
+    return (await db.execute(select(RefreshToken).where(
+        RefreshToken.token_hash == digest(token),
+        RefreshToken.revoked_at == None,
+        RefreshToken.expires_at > _now()
+    ))).scalars().first()
+
+def revoke(row: RefreshToken):
+    row.revoked_at = _now()
+    # Dead from now on: let the purge (which only looks at expires_at) take it
+    row.expires_at = row.revoked_at
+
+def _purge_batch(cutoff, batch_size: int):
+    # Bounded batches keep each delete's locks and WAL small
+    doomed = select(RefreshToken.id).where(RefreshToken.expires_at < cutoff).limit(batch_size)
+    return delete(RefreshToken).where(RefreshToken.id.in_(doomed)).execution_options(synchronize_session=False)
+
+async def purge_expired(db: AsyncSession, batch_size: int = None) -> int:
+    """Delete expired and revoked rows in committed batches. Returns rows deleted."""
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH_SIZE
+    cutoff, total = _now(), 0
+    while True:
+        deleted = (await db.execute(_purge_batch(cutoff, batch_size))).rowcount
+        await db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+def purge_expired_sync(db: Session, batch_size: int = None) -> int:
+    """purge_expired() for the CLI's sync session."""
+    batch_size = batch_size or settings.TOKEN_PURGE_BATCH_SIZE
+    cutoff, total = _now(), 0
+    while True:
+        deleted = db.execute(_purge_batch(cutoff, batch_size)).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+async def purge_periodically():
+    """Lifespan task: purge every TOKEN_PURGE_INTERVAL_SECONDS."""
+    while True:
+        await asyncio.sleep(settings.TOKEN_PURGE_INTERVAL_SECONDS)
+        try:
+            async with AsyncSessionLocal() as db:
+                deleted = await purge_expired(db)
+            if deleted:
+                logger.info("Purged %d expired refresh tokens", deleted)
+        except Exception:
+            logger.exception("Refresh token purge failed")
@@ -0,0 +1,155 @@
+import hashlib
+import os
+import tempfile
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
+
+CHUNK_SIZE = 64 * 1024
+
+# URL prefix stored in Post.image_url (files live in settings.UPLOAD_DIR)
+URL_PREFIX = "uploads"
+
+# Room for the other form fields and multipart boundaries around the file
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# Accepted images, identified by their leading bytes: (signature, offset, mime type, extension)
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", 0, "image/png", "png"),
+    (b"\xff\xd8\xff", 0, "image/jpeg", "jpg"),
+    (b"GIF87a", 0, "image/gif", "gif"),
+    (b"GIF89a", 0, "image/gif", "gif"),
+    (b"WEBP", 8, "image/webp", "webp"), # RIFF....WEBP
+]
+ALLOWED_TYPES = {mime for _, _, mime, _ in IMAGE_SIGNATURES}
+
+def too_large():
+    return HTTPException(
+        status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Image must be at most {settings.MAX_UPLOAD_BYTES} bytes"
+    )
+
+def unsupported_type():
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Image must be one of {sorted(ALLOWED_TYPES)}"
+    )
+
+def sniff_image(head: bytes):
+    """Return (mime type, extension) from the first bytes of a file, or None."""
+    for signature, offset, mime, ext in IMAGE_SIGNATURES:
+        if head[offset:offset + len(signature)] == signature:
+            return mime, ext
+    return None
+
+def _open_temp(directory: str):
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    return os.fdopen(fd, "wb"), path
+
+def _finish(file, temp_path: str, final_path: str):
+    file.flush()
+    os.fsync(file.fileno())
+    file.close()
+    # Atomic on the same filesystem: readers see the whole file or nothing.
+    # Identical content maps to the same name, so re-uploads just overwrite.
+    os.replace(temp_path, final_path)
+
+def _discard(file, temp_path: str):
+    file.close()
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+async def save_upload(image: UploadFile) -> str:
+    """
+    Stream an uploaded image into settings.UPLOAD_DIR and return its URL path.
+
+    The file is checked before anything is written (declared type and size)
+    and again while streaming (magic bytes, running size), copied in chunks
+    on the threadpool and named after its sha256, via a temp file + rename.
+    """
+    # 1. Cheap checks first: declared type and (when known) size
+    if image.content_type not in ALLOWED_TYPES:
+        raise unsupported_type()
+    if image.size is not None and image.size > settings.MAX_UPLOAD_BYTES:
+        raise too_large()
+
+    upload_dir = settings.UPLOAD_DIR
+    file, temp_path = await run_in_threadpool(_open_temp, upload_dir)
+    try:
+        # 2. Stream: sniff the first chunk, hash and count as we go
+        digest = hashlib.sha256()
+        written = 0
+        ext = None
+        while chunk := await image.read(CHUNK_SIZE):
+            if ext is None:
+                sniffed = sniff_image(chunk)
+                if not sniffed or sniffed[0] != image.content_type:
+                    raise unsupported_type()
+                ext = sniffed[1]
+            written += len(chunk)
+            if written > settings.MAX_UPLOAD_BYTES:
+                raise too_large()
+            digest.update(chunk)
+            await run_in_threadpool(file.write, chunk)
+
+        if ext is None: # Empty file
+            raise unsupported_type()
+
+        # 3. Publish under the content hash
+        name = f"{digest.hexdigest()}.{ext}"
+        await run_in_threadpool(_finish, file, temp_path, os.path.join(upload_dir, name))
+    except BaseException:
+        await run_in_threadpool(_discard, file, temp_path)
+        raise
+    return f"{URL_PREFIX}/{name}"
+
+class UploadSizeLimitMiddleware:
+    """
+    Caps multipart request bodies before the form parser spools them to disk:
+    a too-large Content-Length is refused without reading the body, and a
+    body that streams past the limit is cut off with 413 mid-way.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._is_multipart(scope):
+            return await self.app(scope, receive, send)
+
+        limit = settings.MAX_UPLOAD_BYTES + FORM_OVERHEAD_BYTES
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Re-raised as-is by FastAPI's body parsing and rendered as a 413
+                    raise too_large()
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    @staticmethod
+    def _is_multipart(scope):
+        content_type = dict(scope["headers"]).get(b"content-type", b"")
+        return content_type.startswith(b"multipart/form-data")
+
+    @staticmethod
+    async def _reject(send):
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_CONTENT_TOO_LARGE,
+            "headers": [(b"content-type", b"application/json"), (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": b'{"detail":"Request body too large"}'})
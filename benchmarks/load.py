@@ -0,0 +1,243 @@
+"""
+Closed-loop HTTP load against a database filled by benchmarks/seed.py.
+
+Each worker logs in as a seeded user and loops over a weighted mix of
+feed, listing, detail, comments, search, trending, profile, like and
+create requests until the time is up. Latencies from the warm-up period
+are dropped. The JSON report has p50/p95/p99 and throughput per route,
+and the git commit and settings of the run. Pass an earlier report as
+--baseline to add the change per route.
+
+Against a running server (start it with RATE_LIMIT_ENABLED=false, or
+the logins and likes get 429s):
+
+    python -m benchmarks.load --base-url http://127.0.0.1:8000 --concurrency 32 --duration 60
+
+Or in-process, without the network and the server in the numbers
+(the app uses DATABASE_URL, which must be the seeded database):
+
+    python -m benchmarks.load --asgi --duration 20 --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+import httpx
+from benchmarks.seed import PASSWORD, WORDS, pick, zipf_weights
+
+# route label -> weight. Reads dominate, as on any social site.
+MIX = {
+    "GET /feed/": 30,
+    "GET /posts/": 20,
+    "GET /posts/{id}": 20,
+    "GET /posts/{id}/comments": 10,
+    "GET /posts/?q=": 5,
+    "GET /posts/trending": 5,
+    "GET /users/{username}": 5,
+    "POST /like/{id}/like": 7,
+    "POST /posts/": 3,
+}
+
+class Workload:
+    """Shared state: tokens of the logged-in users and the range of post ids."""
+
+    def __init__(self, tokens, max_post_id: int):
+        self.tokens = tokens
+        self.max_post_id = max_post_id
+        # Recent posts are read (and liked) the most
+        self.recency = zipf_weights(max_post_id, 0.9)
+
+    def post_id(self, rng: random.Random) -> int:
+        return self.max_post_id - pick(rng, self.recency)
+
+    def request(self, route: str, rng: random.Random, token: str, cursors: dict):
+        """(method, url, request kwargs) for one call of `route`."""
+        auth = {"headers": {"Authorization": f"Bearer {token}"}}
+        if route == "GET /feed/":
+            # A third of the reads scroll on to the next page
+            cursor = cursors.pop(route, None) if rng.random() < 0.33 else None
+            return "GET", "/feed/", {**auth, "params": {"cursor": cursor} if cursor else {}}
+        if route == "GET /posts/":
+            cursor = cursors.pop(route, None) if rng.random() < 0.33 else None
+            return "GET", "/posts/", {"params": {"cursor": cursor} if cursor else {}}
+        if route == "GET /posts/{id}":
+            return "GET", f"/posts/{self.post_id(rng)}", auth
+        if route == "GET /posts/{id}/comments":
+            return "GET", f"/posts/{self.post_id(rng)}/comments", {}
+        if route == "GET /posts/?q=":
+            return "GET", "/posts/", {"params": {"q": rng.choice(WORDS)}}
+        if route == "GET /posts/trending":
+            return "GET", "/posts/trending", {}
+        if route == "GET /users/{username}":
+            return "GET", f"/users/user{rng.randint(1, len(self.tokens))}", {}
+        if route == "POST /like/{id}/like":
+            return "POST", f"/like/{self.post_id(rng)}/like", auth
+        if route == "POST /posts/":
+            content = " ".join(rng.choice(WORDS) for _ in range(20))
+            return "POST", "/posts/", {**auth, "data": {"title": "Load test", "content": content}}
+        raise ValueError(f"Unknown route '{route}'")
+
+async def login(client: httpx.AsyncClient, users: int):
+    async def one(user_id: int):
+        response = await client.post("/auth/login", data={"username": f"user{user_id}", "password": PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f"Login as user{user_id} failed ({response.status_code}): seeded database? rate limits off?")
+        return response.json()["access_token"]
+    return await asyncio.gather(*(one(user_id) for user_id in range(1, users + 1)))
+
+async def worker(index: int, client, workload: Workload, mix, seed: int, warmup_end: float, deadline: float, samples):
+    rng = random.Random(seed * 1000 + index)
+    token = workload.tokens[index % len(workload.tokens)]
+    routes, weights = list(mix), list(mix.values())
+    cursors = {}
+    while True:
+        route = rng.choices(routes, weights)[0]
+        method, url, kwargs = workload.request(route, rng, token, cursors)
+        started = time.perf_counter()
+        if started >= deadline:
+            return
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+            if response.headers.get("X-Next-Cursor"):
+                cursors[route] = response.headers["X-Next-Cursor"]
+        except httpx.HTTPError:
+            status = 0 # Connection error or timeout
+        if started >= warmup_end:
+            samples[route].append((time.perf_counter() - started, status))
+
+def percentile(sorted_values, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(samples, seconds: float):
+    def stats(items):
+        latencies = sorted(latency for latency, _ in items)
+        statuses = defaultdict(int)
+        for _, status in items:
+            statuses[status] += 1
+        return {
+            "requests": len(items),
+            "rps": round(len(items) / seconds, 1),
+            "errors": sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+            "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        }
+    routes = {route: stats(items) for route, items in sorted(samples.items()) if items}
+    everything = [sample for items in samples.values() for sample in items]
+    return routes, stats(everything) if everything else {}
+
+def compare(report, baseline):
+    """Per-route change against an earlier report, in percent (negative is faster)."""
+    def change(new, old):
+        return round((new - old) / old * 100, 1) if old else None
+    deltas = {}
+    for route, new in {**report["routes"], "total": report["total"]}.items():
+        old = baseline["routes"].get(route) if route != "total" else baseline.get("total")
+        if old:
+            deltas[route] = {key: change(new[key], old[key]) for key in ("rps", "p50_ms", "p95_ms", "p99_ms")}
+    return {"commit": baseline["meta"].get("commit"), "change_pct": deltas}
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+async def run(client: httpx.AsyncClient, args, mix):
+    tokens = await login(client, args.users)
+    newest = (await client.get("/posts/", params={"limit": 1})).json()
+    if not newest:
+        raise SystemExit("No posts: run benchmarks.seed first")
+    workload = Workload(tokens, newest[0]["id"])
+
+    samples = defaultdict(list)
+    start = time.perf_counter()
+    warmup_end = start + args.warmup
+    deadline = warmup_end + args.duration
+    await asyncio.gather(*(
+        worker(index, client, workload, mix, args.seed, warmup_end, deadline, samples)
+        for index in range(args.concurrency)
+    ))
+    measured = time.perf_counter() - warmup_end
+    routes, total = summarize(samples, measured)
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": "asgi" if args.asgi else args.base_url,
+            "concurrency": args.concurrency,
+            "duration_s": round(measured, 1),
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "seed": args.seed,
+            "mix": mix,
+            "python": platform.python_version(),
+        },
+        "routes": routes,
+        "total": total,
+    }
+
+async def main_async(args, mix):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if not args.asgi:
+        async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+            return await run(client, args, mix)
+
+    from app.core.config import settings
+    from app.main import app
+    settings.RATE_LIMIT_ENABLED = False
+    # Server errors become 500s in the report instead of exceptions here
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            return await run(client, args, mix)
+
+def parse_mix(value: str):
+    """"GET /feed/=50,GET /posts/=50" -> weights, on top of the default routes set to 0."""
+    mix = dict.fromkeys(MIX, 0)
+    for item in value.split(","):
+        route, _, weight = item.rpartition("=")
+        if route not in MIX:
+            raise argparse.ArgumentTypeError(f"Unknown route '{route}', expected one of: {', '.join(MIX)}")
+        mix[route] = int(weight)
+    return {route: weight for route, weight in mix.items() if weight}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--asgi", action="store_true", help="Drive app.main:app in-process instead of --base-url")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent workers (virtual users)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds, after the warm-up")
+    parser.add_argument("--warmup", type=float, default=5, help="Seconds of load before measuring")
+    parser.add_argument("--users", type=int, default=50, help="Seeded accounts to log in as (user1..userN)")
+    parser.add_argument("--mix", type=parse_mix, default=MIX, help="Route weights, e.g. 'GET /feed/=70,GET /posts/=30'")
+    parser.add_argument("--seed", type=int, default=1, help="Seeds the request sequence of every worker")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--output", help="Also write the report to this file")
+    parser.add_argument("--baseline", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args, args.mix))
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["baseline"] = compare(report, json.load(f))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+Bulk synthetic data for load tests: users, a power-law follow graph,
+posts, likes, comments and the materialized timelines, written with
+multi-row INSERTs in large batches. Ids are assigned here so that rows
+can reference each other without round trips. The same --seed always
+produces the same data.
+
+Every user's password is "password" (usernames user1, user2, ...).
+
+    python -m benchmarks.seed --database-url sqlite:///bench.db --users 2000 --posts 50000
+    python -m benchmarks.seed --database-url postgresql://... --users 50000 --posts 1000000 --reset
+
+Point the app at the same database (DATABASE_URL) before running
+benchmarks/load.py. Timelines grow with posts x followers and the most
+followed users post the most: on the defaults expect over 100 timeline
+rows per post.
+"""
+import argparse
+import bisect
+import itertools
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import create_engine, func, insert, select, text
+from sqlalchemy.orm import Session
+from app.core.hashing import pwd_context
+from app.db.base import Base
+from app.db.models import User, Post, Follow, Like, Comment, TimelineEntry
+from app.utils import counters, hot_score
+from app.utils.timeline import FOLLOWER_VISIBILITIES
+import app.db.models # Registers the search DDL listeners
+
+PASSWORD = "password"
+BATCH_SIZE = 5000
+VISIBILITIES = (("public", 0.8), ("followers", 0.15), ("private", 0.05))
+WORDS = (
+    "coffee morning python database latency cache index query stream queue "
+    "travel music photo weekend launch deploy review metrics garden friends "
+    "city river mountain book movie dinner recipe build release bug fix"
+).split()
+
+def zipf_weights(count: int, exponent: float):
+    """Cumulative weights for rng.choices: rank r gets 1 / r**exponent."""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def pick(rng: random.Random, cum_weights):
+    """Index drawn from cumulative weights (rng.choices without the list overhead)."""
+    return bisect.bisect(cum_weights, rng.random() * cum_weights[-1])
+
+def text_of(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def write(db: Session, model, rows, label: str):
+    """Insert an iterable of dicts in batches; returns the row count."""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.execute(insert(model), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(model), batch)
+        total += len(batch)
+    db.commit()
+    print(f"  {label}: {total}")
+    return total
+
+def seed(db: Session, users: int, posts: int, follows_per_user: int, likes_per_post: float,
+         comments_per_post: float, days: int, rng: random.Random):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    start = now - timedelta(days=days)
+    # A handful of users are celebrities: followed, liked and posting far more than the rest
+    popularity = zipf_weights(users, 1.1)
+    activity = zipf_weights(users, 0.8)
+    virality = zipf_weights(posts, 0.9)
+    stats = {}
+
+    # 1. Users: one bcrypt hash shared by everyone keeps this fast
+    password_hash = pwd_context.hash(PASSWORD)
+    stats["users"] = write(db, User, (
+        {
+            "id": user_id, "username": f"user{user_id}", "email": f"user{user_id}@example.com",
+            "password_hash": password_hash, "role": "user",
+            "created_at": start, "updated_at": start
+        }
+        for user_id in range(1, users + 1)
+    ), "users")
+
+    # 2. Follows: out-degree varies around the mean, targets by popularity
+    def follows():
+        for follower_id in range(1, users + 1):
+            degree = min(users - 1, int(rng.expovariate(1 / follows_per_user)))
+            targets = set()
+            for _ in range(degree * 2): # Popular targets repeat; stop trying after a while
+                if len(targets) >= degree:
+                    break
+                target = pick(rng, popularity) + 1
+                if target != follower_id:
+                    targets.add(target)
+            for following_id in targets:
+                yield {"follower_id": follower_id, "following_id": following_id, "created_at": start}
+    stats["follows"] = write(db, Follow, follows(), "follows")
+
+    # 3. Posts: authors by activity, timestamps spread over the window in id order
+    step = (now - start) / max(posts, 1)
+    stats["posts"] = write(db, Post, (
+        {
+            "id": post_id, "user_id": pick(rng, activity) + 1,
+            "title": text_of(rng, 3).capitalize(), "content": text_of(rng, rng.randint(8, 40)),
+            "visibility": rng.choices([v for v, _ in VISIBILITIES], [w for _, w in VISIBILITIES])[0],
+            "created_at": start + step * post_id, "updated_at": start + step * post_id
+        }
+        for post_id in range(1, posts + 1)
+    ), "posts")
+
+    # 4. Likes and comments: a few posts go viral. Newer ids get the highest
+    # weights, and engagement arrives in the hours after a post goes up.
+    def engaged_at(post_id: int):
+        return min(now, start + step * post_id + timedelta(hours=rng.expovariate(1 / 6)))
+
+    def likes():
+        seen = set()
+        for _ in range(int(posts * likes_per_post)):
+            pair = (posts - pick(rng, virality), rng.randint(1, users))
+            if pair not in seen:
+                seen.add(pair)
+                yield {"post_id": pair[0], "user_id": pair[1], "created_at": engaged_at(pair[0])}
+    stats["likes"] = write(db, Like, likes(), "likes")
+
+    def comments():
+        for _ in range(int(posts * comments_per_post)):
+            post_id = posts - pick(rng, virality)
+            yield {
+                "post_id": post_id, "user_id": rng.randint(1, users),
+                "content": text_of(rng, rng.randint(3, 15)), "created_at": engaged_at(post_id)
+            }
+    stats["comments"] = write(db, Comment, comments(), "comments")
+
+    # 5. Timelines, as fan-out on write would have left them: own posts plus
+    # followed authors' shared posts, in two INSERT ... SELECTs
+    db.execute(insert(TimelineEntry).from_select(
+        ["user_id", "post_id", "author_id", "created_at"],
+        select(Post.user_id, Post.id, Post.user_id, Post.created_at)
+    ))
+    db.execute(insert(TimelineEntry).from_select(
+        ["user_id", "post_id", "author_id", "created_at"],
+        select(Follow.follower_id, Post.id, Post.user_id, Post.created_at)
+        .join(Follow, Follow.following_id == Post.user_id)
+        .where(Post.visibility.in_(FOLLOWER_VISIBILITIES))
+    ))
+    db.commit()
+    stats["timelines"] = db.scalar(select(func.count()).select_from(TimelineEntry))
+    print(f"  timelines: {stats['timelines']}")
+
+    # 6. Denormalized counters and hot scores from the rows just written
+    counters.reconcile(db)
+    hot_score.rebuild(db)
+    return stats
+
+def reset_sequences(db: Session):
+    """Explicit ids leave Postgres sequences at 1: move them past the data."""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for table in ("users", "posts", "likes", "comments"):
+        db.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 1)) FROM {table}"
+        ))
+    db.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Defaults to the app's DATABASE_URL")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--follows-per-user", type=int, default=30, help="Mean out-degree")
+    parser.add_argument("--likes-per-post", type=float, default=5.0)
+    parser.add_argument("--comments-per-post", type=float, default=1.0)
+    parser.add_argument("--days", type=int, default=90, help="Time span of the posts")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="Drop and recreate all tables first")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        from app.core.config import settings
+        args.database_url = settings.DATABASE_URL
+    engine = create_engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(User)):
+            parser.error("The database already has users: use an empty database or --reset")
+        print(f"Seeding {engine.url.render_as_string(hide_password=True)}")
+        stats = seed(
+            db, args.users, args.posts, args.follows_per_user, args.likes_per_post,
+            args.comments_per_post, args.days, random.Random(args.seed)
+        )
+        reset_sequences(db)
+    print(json.dumps({"seed": args.seed, "rows": stats, "seconds": round(time.perf_counter() - started, 1)}, indent=2))
+
+if __name__ == "__main__":
+    main()
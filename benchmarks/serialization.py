@@ -0,0 +1,62 @@
+"""
+Serialization cost of a feed page, per item.
+
+Compares the ways a list of Post rows can be turned into a JSON body:
+  jsonable_encoder   no response_model: FastAPI's reflective encoder + json.dumps
+  response_model     FastAPI with response_model: validate, dump to dicts, json.dumps
+  type_adapter       app.utils.responses.json_response: validate + dump_json in one pass
+
+No database needed: the rows are transient ORM objects.
+
+    python -m benchmarks.serialization --items 100 --repeat 50
+"""
+import argparse
+import json
+import timeit
+from datetime import datetime, timezone
+from fastapi.encoders import jsonable_encoder
+from app.db.models import Post
+from app.schemas.post import PostOutList
+
+LOOPS = 10 # Calls per timed run, to smooth out timer noise
+
+def make_posts(count: int):
+    now = datetime.now(timezone.utc)
+    return [
+        Post(
+            id=i, user_id=i % 10, title=f"Post {i}", content="Lorem ipsum dolor sit amet " * 8,
+            image_url=None, visibility="public", likes_count=i, comments_count=i // 2,
+            created_at=now, updated_at=now
+        )
+        for i in range(count)
+    ]
+
+def run(items: int, repeat: int):
+    posts = make_posts(items)
+    strategies = {
+        "jsonable_encoder": lambda: json.dumps(jsonable_encoder(posts)).encode(),
+        "response_model": lambda: json.dumps(
+            PostOutList.dump_python(PostOutList.validate_python(posts, from_attributes=True), mode="json")
+        ).encode(),
+        "type_adapter": lambda: PostOutList.dump_json(PostOutList.validate_python(posts, from_attributes=True)),
+    }
+
+    results = {}
+    for name, fn in strategies.items():
+        fn() # Warm up
+        best = min(timeit.repeat(fn, number=LOOPS, repeat=repeat)) / LOOPS
+        results[name] = {
+            "page_us": round(best * 1e6, 1),
+            "per_item_us": round(best * 1e6 / items, 2),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=100, help="Posts per page")
+    parser.add_argument("--repeat", type=int, default=50, help="Timed runs per strategy (best is kept)")
+    args = parser.parse_args()
+    print(json.dumps({"items": args.items, "results": run(args.items, args.repeat)}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Cold start of a worker, each run in a fresh interpreter:
+  import      python start -> `import app.main` done (no database I/O)
+  warmup      lifespan startup: pools, mappers, bcrypt workers, OpenAPI
+  first       first GET /readyz after startup
+
+Needs DATABASE_URL to point at a reachable database for the warm-up.
+
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --no-warmup
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Runs in the child process; prints one JSON line of timings
+CHILD = """
+import asyncio, json, time
+started = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+import httpx
+
+async def main():
+    async with app.main.app.router.lifespan_context(app.main.app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app.main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            status = (await client.get("/readyz")).status_code
+        answered = time.perf_counter()
+    print(json.dumps({
+        "import": imported - started, "warmup": ready - imported, "first": answered - ready, "status": status
+    }))
+
+asyncio.run(main())
+"""
+
+def run(repeat: int, warmup: bool):
+    env = {**os.environ, "STARTUP_WARMUP": "true" if warmup else "false"}
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True)
+        samples.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return {
+        phase: {
+            "median_ms": round(statistics.median(sample[phase] for sample in samples) * 1000, 1),
+            "max_ms": round(max(sample[phase] for sample in samples) * 1000, 1),
+        }
+        for phase in ("import", "warmup", "first")
+    } | {"readyz_status": samples[-1]["status"]}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to start")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false", help="Start with STARTUP_WARMUP=false")
+    args = parser.parse_args()
+    print(json.dumps({"repeat": args.repeat, "warmup": args.warmup, "phases": run(args.repeat, args.warmup)}, indent=2))
+
+if __name__ == "__main__":
+    main()